@@ -1,41 +1,197 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request, jsonify, current_app
+from werkzeug.exceptions import HTTPException
 import sqlite3
-from datetime import datetime, timedelta
+import re
+from datetime import date, datetime, time
+from db import connect, enable_wal, get_db, write_lock
+from json_provider import stream_json_rows
 
 # Create a Blueprint for booking routes
 booking_bp = Blueprint('booking', __name__)
 
+BOOKING_STATUSES = ('pending', 'approved', 'rejected', 'completed', 'cancelled', 'paid_deposit')
+VALID_STATUSES = frozenset(BOOKING_STATUSES)
+INVALID_STATUS_ERROR = f"Invalid status. Must be one of: {', '.join(BOOKING_STATUSES)}"
+
+CREATE_REQUIRED_FIELDS = frozenset({'user_id', 'service_id', 'booking_date', 'booking_time'})
+
+# Hourly booking slots from 12:00 AM to 11:00 PM
+ALL_SLOTS = tuple(f'{hour:02d}:00' for hour in range(24))
+
+# SQL used by the booking routes; kept as constants so every request hits
+# the connection's prepared statement cache with identical text
+SQL_SERVICE_PRICE = 'SELECT provider_id, price FROM services WHERE id = ?'
+
+SQL_SERVICE_FOR_BOOKING = '''
+    SELECT s.provider_id, s.price, s.service_title, s.service_image,
+           p.business_name
+    FROM services s
+    LEFT JOIN service_providers p ON s.provider_id = p.id
+    WHERE s.id = ?
+'''
+
+SQL_USER_CONTACT = 'SELECT name, mobile FROM users WHERE id = ?'
+
+# Inserts nothing (and returns no row) when the user doesn't exist
+SQL_INSERT_BOOKING = '''
+    INSERT INTO bookings (
+        user_id, service_id, provider_id, booking_date, booking_time,
+        total_amount, booking_notes, status
+    )
+    SELECT ?, ?, ?, ?, ?, ?, ?, 'pending'
+    WHERE EXISTS (SELECT 1 FROM users WHERE id = ?)
+    RETURNING id, status, created_at
+'''
+
+SQL_PROVIDER_BOOKINGS = '''
+    SELECT b.id, b.user_id, b.service_id, b.booking_date, b.booking_time,
+           b.status, b.total_amount, b.booking_notes, b.created_at,
+           s.service_title, s.service_image,
+           u.name as user_name, u.mobile as user_mobile
+    FROM bookings b
+    JOIN services s ON b.service_id = s.id
+    JOIN users u ON b.user_id = u.id
+    WHERE b.provider_id = ?
+'''
+
+SQL_USER_BOOKINGS = '''
+    SELECT b.id, b.service_id, b.provider_id, b.booking_date, b.booking_time,
+           b.status, b.total_amount, b.booking_notes, b.created_at,
+           s.service_title, s.service_image,
+           p.business_name as provider_name
+    FROM bookings b
+    JOIN services s ON b.service_id = s.id
+    JOIN service_providers p ON b.provider_id = p.id
+    WHERE b.user_id = ?
+'''
+
+SQL_BOOKING_EXISTS = 'SELECT status FROM bookings WHERE id = ?'
+
+SQL_UPDATE_BOOKING_STATUS = '''
+    UPDATE bookings 
+    SET status = ?,
+        updated_at = CURRENT_TIMESTAMP
+    WHERE id = ?
+'''
+
+# Availability for every slot on a date, skipping slots that have already
+# started when the date is today
+SQL_TIMESLOTS = '''
+    WITH slots(slot) AS (VALUES %s)
+    SELECT slot,
+           NOT EXISTS (
+               SELECT 1 FROM bookings
+               WHERE service_id = ?
+               AND booking_date = ?
+               AND booking_time = slot
+               AND status IN ('pending', 'approved')
+           ) AS available
+    FROM slots
+    WHERE ? != date('now', 'localtime')
+    OR slot > strftime('%%H:00', 'now', 'localtime')
+    ORDER BY slot
+''' % ', '.join(f"('{slot}')" for slot in ALL_SLOTS)
+
+SQL_BOOKING_DETAILS = '''
+    SELECT b.id, b.user_id, b.service_id, b.provider_id, b.booking_date,
+           b.booking_time, b.status, b.total_amount, b.booking_notes,
+           b.created_at, b.updated_at, s.service_title, s.service_image,
+           u.name as user_name, u.mobile as user_mobile,
+           p.business_name as provider_name
+    FROM bookings b
+    JOIN services s ON b.service_id = s.id
+    JOIN users u ON b.user_id = u.id
+    JOIN service_providers p ON b.provider_id = p.id
+    WHERE b.id = ?
+'''
+
+# Dates and times are ISO text (YYYY-MM-DD, HH:MM) and amounts are REAL;
+# STRICT rejects anything else instead of storing it under some other type
+SQL_CREATE_BOOKINGS = '''
+    CREATE TABLE IF NOT EXISTS {table} (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        user_id INTEGER NOT NULL,
+        service_id INTEGER NOT NULL,
+        provider_id INTEGER NOT NULL,
+        booking_date TEXT NOT NULL,
+        booking_time TEXT NOT NULL,
+        status TEXT NOT NULL DEFAULT 'pending',  -- pending, approved, rejected, completed, cancelled, paid_deposit
+        total_amount REAL NOT NULL,
+        booking_notes TEXT,
+        created_at TEXT DEFAULT CURRENT_TIMESTAMP,
+        updated_at TEXT DEFAULT CURRENT_TIMESTAMP,
+        FOREIGN KEY (user_id) REFERENCES users (id),
+        FOREIGN KEY (service_id) REFERENCES services (id),
+        FOREIGN KEY (provider_id) REFERENCES service_providers (id)
+    ) STRICT
+'''
+
+SQL_COPY_TO_STRICT_BOOKINGS = '''
+    INSERT INTO bookings_strict
+    SELECT id, CAST(user_id AS INTEGER), CAST(service_id AS INTEGER),
+           CAST(provider_id AS INTEGER), CAST(booking_date AS TEXT),
+           CAST(booking_time AS TEXT), status, CAST(total_amount AS REAL),
+           booking_notes, CAST(created_at AS TEXT), CAST(updated_at AS TEXT)
+    FROM bookings
+'''
+
+# Unexpected errors in any booking route become a JSON 500
+@booking_bp.errorhandler(Exception)
+def handle_booking_error(e):
+    if isinstance(e, HTTPException):
+        return e
+    current_app.logger.exception(e)
+    return jsonify({'error': str(e)}), 500
+
 def init_booking_db():
-    conn = sqlite3.connect('home_service.db')
+    conn = connect()
+    enable_wal(conn)
+    # The STRICT rebuild below drops and renames bookings, which other tables
+    # reference; foreign keys can only be toggled outside a transaction
+    conn.execute('PRAGMA foreign_keys = OFF')
     c = conn.cursor()
     
+    # Apply the whole schema in one transaction rather than one per statement
+    c.execute('BEGIN')
+    
     # Create bookings table
-    c.execute('''
-        CREATE TABLE IF NOT EXISTS bookings (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            user_id INTEGER NOT NULL,
-            service_id INTEGER NOT NULL,
-            provider_id INTEGER NOT NULL,
-            booking_date DATE NOT NULL,
-            booking_time TIME NOT NULL,
-            status TEXT NOT NULL DEFAULT 'pending',  -- pending, approved, rejected, completed, cancelled
-            total_amount DECIMAL(10,2) NOT NULL,
-            booking_notes TEXT,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            FOREIGN KEY (user_id) REFERENCES users (id),
-            FOREIGN KEY (service_id) REFERENCES services (id),
-            FOREIGN KEY (provider_id) REFERENCES service_providers (id)
-        )
-    ''')
+    c.execute(SQL_CREATE_BOOKINGS.format(table='bookings'))
+    
+    # Rebuild a bookings table created before the schema was STRICT
+    table = c.execute("SELECT strict FROM pragma_table_list WHERE name = 'bookings'").fetchone()
+    if not table['strict']:
+        c.execute(SQL_CREATE_BOOKINGS.format(table='bookings_strict'))
+        c.execute(SQL_COPY_TO_STRICT_BOOKINGS)
+        c.execute('DROP TABLE bookings')
+        c.execute('ALTER TABLE bookings_strict RENAME TO bookings')
     
-    # Create index for better query performance
-    c.execute('''CREATE INDEX IF NOT EXISTS idx_bookings_provider 
-                 ON bookings (provider_id)''')
-    c.execute('''CREATE INDEX IF NOT EXISTS idx_bookings_service 
-                 ON bookings (service_id)''')
-    c.execute('''CREATE INDEX IF NOT EXISTS idx_bookings_user 
-                 ON bookings (user_id)''')
+    # Create indexes matching the listing and timeslot query shapes
+    c.execute('''CREATE INDEX IF NOT EXISTS idx_bookings_provider_date
+                 ON bookings (provider_id, booking_date DESC, booking_time DESC)''')
+    c.execute('''CREATE INDEX IF NOT EXISTS idx_bookings_service_date_status
+                 ON bookings (service_id, booking_date, status)''')
+    c.execute('''CREATE INDEX IF NOT EXISTS idx_bookings_user_date
+                 ON bookings (user_id, booking_date DESC)''')
+    
+    # Per-provider booking counts by status, and recent activity
+    c.execute('''CREATE INDEX IF NOT EXISTS idx_bookings_provider_status
+                 ON bookings (provider_id, status)''')
+    c.execute('''CREATE INDEX IF NOT EXISTS idx_bookings_created
+                 ON bookings (created_at DESC)''')
+    
+    # Completed bookings by date for the monthly chart
+    c.execute('''CREATE INDEX IF NOT EXISTS idx_bookings_status_date
+                 ON bookings (status, booking_date)''')
+    
+    # Superseded by the composite indexes above
+    c.execute('DROP INDEX IF EXISTS idx_bookings_provider')
+    c.execute('DROP INDEX IF EXISTS idx_bookings_service')
+    c.execute('DROP INDEX IF EXISTS idx_bookings_user')
+    
+    # Only one active booking per service time slot
+    c.execute('''CREATE UNIQUE INDEX IF NOT EXISTS idx_bookings_slot
+                 ON bookings (service_id, booking_date, booking_time)
+                 WHERE status IN ('pending', 'approved', 'paid_deposit')''')
     
     conn.commit()
     conn.close()
@@ -43,386 +199,246 @@ def init_booking_db():
 # Initialize booking table
 init_booking_db()
 
+# Booking dates and times are accepted only as YYYY-MM-DD and HH:MM; the
+# fromisoformat parsers alone would also take compact dates, seconds and
+# UTC offsets
+BOOKING_DATE = re.compile(r'[0-9]{4}-[0-9]{2}-[0-9]{2}')
+BOOKING_TIME = re.compile(r'[0-9]{2}:[0-9]{2}')
+
+# Pass ?include=details to also get the service title/image, user name/mobile
+# and provider name back in the response
 @booking_bp.route('/create', methods=['POST'])
 def create_booking():
+    data = request.get_json()
+    
+    # Validate required fields, reporting every missing one at once
+    missing = CREATE_REQUIRED_FIELDS - data.keys()
+    if missing:
+        return jsonify({'error': f"Missing required fields: {', '.join(sorted(missing))}"}), 400
+
+    now = datetime.now()
+    today = now.date()
+
+    # Validate date and time format
     try:
-        data = request.get_json()
-        required_fields = ['user_id', 'service_id', 'booking_date', 'booking_time']
+        if not (isinstance(data['booking_date'], str) and BOOKING_DATE.fullmatch(data['booking_date'])
+                and isinstance(data['booking_time'], str) and BOOKING_TIME.fullmatch(data['booking_time'])):
+            raise ValueError
+        booking_date = date.fromisoformat(data['booking_date'])
+        booking_time = time.fromisoformat(data['booking_time'])
         
-        # Validate required fields
-        for field in required_fields:
-            if field not in data:
-                return jsonify({'error': f'{field} is required'}), 400
-
-        # Validate date and time format
-        try:
-            booking_date = datetime.strptime(data['booking_date'], '%Y-%m-%d').date()
-            booking_time = datetime.strptime(data['booking_time'], '%H:%M').time()
+        # Check if booking date is in the past
+        if booking_date < today:
+            return jsonify({'error': 'Cannot book for past dates'}), 400
             
-            # Check if booking date is in the past
-            if booking_date < datetime.now().date():
-                return jsonify({'error': 'Cannot book for past dates'}), 400
-                
-            # Check if booking time is within allowed range (12:00 AM to 11:00 PM)
-            booking_datetime = datetime.combine(booking_date, booking_time)
-            if booking_datetime < datetime.now():
-                return jsonify({'error': 'Cannot book for past time slots'}), 400
-        except ValueError:
-            return jsonify({'error': 'Invalid date or time format'}), 400
-
-        conn = sqlite3.connect('home_service.db')
-        c = conn.cursor()
-        
-        # Get service details
-        c.execute('SELECT provider_id, price FROM services WHERE id = ?', (data['service_id'],))
-        service = c.fetchone()
-        
-        if not service:
-            conn.close()
-            return jsonify({'error': 'Service not found'}), 404
-        
-        provider_id, service_price = service
-        
-        # Check if the time slot is available
-        c.execute('''
-            SELECT COUNT(*) FROM bookings 
-            WHERE service_id = ? 
-            AND booking_date = ? 
-            AND booking_time = ?
-            AND status IN ('pending', 'approved', 'paid_deposit')
-        ''', (data['service_id'], data['booking_date'], data['booking_time']))
-        
-        if c.fetchone()[0] > 0:
-            conn.close()
-            return jsonify({'error': 'This time slot is already booked'}), 409
+        # Check if booking time has already passed today
+        if booking_date == today and booking_time < now.time():
+            return jsonify({'error': 'Cannot book for past time slots'}), 400
+    except ValueError:
+        return jsonify({'error': 'Invalid date or time format'}), 400
 
-        # Create booking
-        c.execute('''
-            INSERT INTO bookings (
-                user_id, service_id, provider_id, booking_date, booking_time,
-                total_amount, booking_notes, status
-            )
-            VALUES (?, ?, ?, ?, ?, ?, ?, 'pending')
-        ''', (
-            data['user_id'],
-            data['service_id'],
-            provider_id,
-            data['booking_date'],
-            data['booking_time'],
-            service_price,
-            data.get('booking_notes')
-        ))
+    include_details = request.args.get('include') == 'details'
+    conn = get_db()
+    
+    # Get service details
+    service_query = SQL_SERVICE_FOR_BOOKING if include_details else SQL_SERVICE_PRICE
+    service = conn.execute(service_query, (data['service_id'],)).fetchone()
+    
+    if not service:
+        return jsonify({'error': 'Service not found'}), 404
+    
+    provider_id, service_price = service['provider_id'], service['price']
+    
+    if include_details:
+        # Get user contact details
+        user = conn.execute(SQL_USER_CONTACT, (data['user_id'],)).fetchone()
         
-        conn.commit()
-        booking_id = c.lastrowid
+        if not user:
+            return jsonify({'error': 'User not found'}), 404
+    
+    # Create booking; the slot index rejects a clash with an active booking
+    with write_lock:
+        # Take the write lock up front instead of upgrading mid-transaction
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            c = conn.execute(SQL_INSERT_BOOKING, (
+                data['user_id'],
+                data['service_id'],
+                provider_id,
+                data['booking_date'],
+                data['booking_time'],
+                service_price,
+                data.get('booking_notes'),
+                data['user_id']
+            ))
+        except sqlite3.IntegrityError:
+            conn.rollback()
+            return jsonify({'error': 'This time slot is already booked'}), 409
         
-        # Get booking details
-        c.execute('''
-            SELECT b.*, s.service_title, s.service_image,
-                   u.name as user_name, u.mobile as user_mobile,
-                   p.business_name as provider_name
-            FROM bookings b
-            JOIN services s ON b.service_id = s.id
-            JOIN users u ON b.user_id = u.id
-            JOIN service_providers p ON b.provider_id = p.id
-            WHERE b.id = ?
-        ''', (booking_id,))
+        created = c.fetchone()
+        if not created:
+            conn.rollback()
+            return jsonify({'error': 'User not found'}), 404
         
-        booking = c.fetchone()
-        conn.close()
-
-        return jsonify({
-            'message': 'Booking created successfully',
-            'booking': {
-                'id': booking[0],
-                'user_id': booking[1],
-                'service_id': booking[2],
-                'provider_id': booking[3],
-                'booking_date': booking[4],
-                'booking_time': booking[5],
-                'status': booking[6],
-                'total_amount': booking[7],
-                'booking_notes': booking[8],
-                'created_at': booking[9],
-                'service_title': booking[11],
-                'service_image': booking[12],
-                'user_name': booking[13],
-                'user_mobile': booking[14],
-                'provider_name': booking[15]
-            }
-        }), 201
-
-    except Exception as e:
-        return jsonify({'error': str(e)}), 500
+        conn.commit()
+
+    booking = {
+        'id': created['id'],
+        'user_id': data['user_id'],
+        'service_id': data['service_id'],
+        'provider_id': provider_id,
+        'booking_date': data['booking_date'],
+        'booking_time': data['booking_time'],
+        'status': created['status'],
+        'total_amount': service_price,
+        'booking_notes': data.get('booking_notes'),
+        'created_at': created['created_at']
+    }
+    
+    if include_details:
+        booking.update({
+            'service_title': service['service_title'],
+            'service_image': service['service_image'],
+            'user_name': user['name'],
+            'user_mobile': user['mobile'],
+            'provider_name': service['business_name']
+        })
+
+    return jsonify({
+        'message': 'Booking created successfully',
+        'booking': booking
+    }), 201
 
 @booking_bp.route('/provider/<int:provider_id>/bookings', methods=['GET'])
 def get_provider_bookings(provider_id):
-    try:
-        conn = sqlite3.connect('home_service.db')
-        c = conn.cursor()
-        
-        # Get query parameters
-        status = request.args.get('status')
-        start_date = request.args.get('start_date')
-        end_date = request.args.get('end_date')
+    conn = get_db()
+    
+    # Get query parameters
+    status = request.args.get('status')
+    start_date = request.args.get('start_date')
+    end_date = request.args.get('end_date')
+    
+    query = SQL_PROVIDER_BOOKINGS
+    params = [provider_id]
+    
+    if status:
+        query += ' AND b.status = ?'
+        params.append(status)
         
-        query = '''
-            SELECT b.*, s.service_title, s.service_image,
-                   u.name as user_name, u.mobile as user_mobile
-            FROM bookings b
-            JOIN services s ON b.service_id = s.id
-            JOIN users u ON b.user_id = u.id
-            WHERE b.provider_id = ?
-        '''
-        params = [provider_id]
+    if start_date:
+        query += ' AND b.booking_date >= ?'
+        params.append(start_date)
         
-        if status:
-            query += ' AND b.status = ?'
-            params.append(status)
-            
-        if start_date:
-            query += ' AND b.booking_date >= ?'
-            params.append(start_date)
-            
-        if end_date:
-            query += ' AND b.booking_date <= ?'
-            params.append(end_date)
-            
-        query += ' ORDER BY b.booking_date DESC, b.booking_time DESC'
+    if end_date:
+        query += ' AND b.booking_date <= ?'
+        params.append(end_date)
         
-        c.execute(query, params)
-        bookings = c.fetchall()
-        conn.close()
-
-        bookings_list = [{
-            'id': booking[0],
-            'user_id': booking[1],
-            'service_id': booking[2],
-            'booking_date': booking[4],
-            'booking_time': booking[5],
-            'status': booking[6],
-            'total_amount': booking[7],
-            'booking_notes': booking[8],
-            'created_at': booking[9],
-            'service_title': booking[11],
-            'service_image': booking[12],
-            'user_name': booking[13],
-            'user_mobile': booking[14]
-        } for booking in bookings]
-
-        return jsonify({
-            'total_bookings': len(bookings_list),
-            'bookings': bookings_list
-        }), 200
-
-    except Exception as e:
-        return jsonify({'error': str(e)}), 500
+    query += ' ORDER BY b.booking_date DESC, b.booking_time DESC'
+    
+    # Stream the rows straight from the cursor
+    bookings = conn.execute(query, params)
+    return stream_json_rows('bookings', bookings, count_key='total_bookings'), 200
 
 @booking_bp.route('/user/<int:user_id>/bookings', methods=['GET'])
 def get_user_bookings(user_id):
-    try:
-        conn = sqlite3.connect('home_service.db')
-        c = conn.cursor()
-        
-        # Get query parameters
-        status = request.args.get('status')
-        
-        query = '''
-            SELECT b.*, s.service_title, s.service_image,
-                   p.business_name as provider_name
-            FROM bookings b
-            JOIN services s ON b.service_id = s.id
-            JOIN service_providers p ON b.provider_id = p.id
-            WHERE b.user_id = ?
-        '''
-        params = [user_id]
-        
-        if status:
-            query += ' AND b.status = ?'
-            params.append(status)
-            
-        query += ' ORDER BY b.booking_date DESC, b.booking_time DESC'
+    conn = get_db()
+    
+    # Get query parameters
+    status = request.args.get('status')
+    
+    query = SQL_USER_BOOKINGS
+    params = [user_id]
+    
+    if status:
+        query += ' AND b.status = ?'
+        params.append(status)
         
-        c.execute(query, params)
-        bookings = c.fetchall()
-        conn.close()
-
-        bookings_list = [{
-            'id': booking[0],
-            'service_id': booking[2],
-            'provider_id': booking[3],
-            'booking_date': booking[4],
-            'booking_time': booking[5],
-            'status': booking[6],
-            'total_amount': booking[7],
-            'booking_notes': booking[8],
-            'created_at': booking[9],
-            'service_title': booking[11],
-            'service_image': booking[12],
-            'provider_name': booking[13]
-        } for booking in bookings]
-
-        return jsonify({
-            'total_bookings': len(bookings_list),
-            'bookings': bookings_list
-        }), 200
-
-    except Exception as e:
-        return jsonify({'error': str(e)}), 500
+    query += ' ORDER BY b.booking_date DESC, b.booking_time DESC'
+    
+    bookings = conn.execute(query, params).fetchall()
+
+    bookings_list = [dict(booking) for booking in bookings]
+
+    return jsonify({
+        'total_bookings': len(bookings_list),
+        'bookings': bookings_list
+    }), 200
 
 @booking_bp.route('/<int:booking_id>/status', methods=['PUT'])
 def update_booking_status(booking_id):
-    try:
-        data = request.get_json()
-        if 'status' not in data:
-            return jsonify({'error': 'Status is required'}), 400
-            
-        # Validate status
-        valid_statuses = ['pending', 'approved', 'rejected', 'completed', 'cancelled', 'paid_deposit']
-        if data['status'] not in valid_statuses:
-            return jsonify({'error': f"Invalid status. Must be one of: {', '.join(valid_statuses)}"}), 400
-
-        conn = sqlite3.connect('home_service.db')
-        c = conn.cursor()
+    data = request.get_json()
+    if 'status' not in data:
+        return jsonify({'error': 'Status is required'}), 400
         
-        # Check if booking exists
-        c.execute('SELECT status FROM bookings WHERE id = ?', (booking_id,))
-        booking = c.fetchone()
+    # Validate status
+    if data['status'] not in VALID_STATUSES:
+        return jsonify({'error': INVALID_STATUS_ERROR}), 400
+
+    conn = get_db()
+    
+    # Check if booking exists
+    booking = conn.execute(SQL_BOOKING_EXISTS, (booking_id,)).fetchone()
+    
+    if not booking:
+        return jsonify({'error': 'Booking not found'}), 404
         
-        if not booking:
-            conn.close()
-            return jsonify({'error': 'Booking not found'}), 404
-            
-        # Update status
-        c.execute('''
-            UPDATE bookings 
-            SET status = ?,
-                updated_at = CURRENT_TIMESTAMP
-            WHERE id = ?
-        ''', (data['status'], booking_id))
+    # Update status
+    with write_lock:
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            conn.execute(SQL_UPDATE_BOOKING_STATUS, (data['status'], booking_id))
+        except sqlite3.IntegrityError:
+            conn.rollback()
+            return jsonify({'error': 'This time slot is already booked'}), 409
         
         conn.commit()
-        conn.close()
 
-        return jsonify({
-            'message': 'Booking status updated successfully',
-            'booking_id': booking_id,
-            'status': data['status']
-        }), 200
-
-    except Exception as e:
-        return jsonify({'error': str(e)}), 500
+    return jsonify({
+        'message': 'Booking status updated successfully',
+        'booking_id': booking_id,
+        'status': data['status']
+    }), 200
 
 @booking_bp.route('/timeslots', methods=['GET'])
 def get_available_timeslots():
-    try:
-        # Get query parameters
-        service_id = request.args.get('service_id')
-        date = request.args.get('date')
-        
-        if not service_id or not date:
-            return jsonify({'error': 'Service ID and date are required'}), 400
-            
-        try:
-            # Validate date
-            booking_date = datetime.strptime(date, '%Y-%m-%d').date()
-            if booking_date < datetime.now().date():
-                return jsonify({'error': 'Cannot check availability for past dates'}), 400
-        except ValueError:
-            return jsonify({'error': 'Invalid date format'}), 400
-
-        conn = sqlite3.connect('home_service.db')
-        c = conn.cursor()
-        
-        # Get all booked slots for the service on the specified date
-        c.execute('''
-            SELECT booking_time 
-            FROM bookings 
-            WHERE service_id = ? 
-            AND booking_date = ?
-            AND status IN ('pending', 'approved')
-        ''', (service_id, date))
-        
-        booked_slots = {row[0] for row in c.fetchall()}
-        conn.close()
-
-        # Generate all possible time slots (12:00 AM to 11:00 PM)
-        all_slots = []
-        current_time = datetime.strptime('00:00', '%H:%M').time()
-        end_time = datetime.strptime('23:00', '%H:%M').time()
+    # Get query parameters
+    service_id = request.args.get('service_id')
+    date_param = request.args.get('date')
+    
+    if not service_id or not date_param:
+        return jsonify({'error': 'Service ID and date are required'}), 400
         
-        while current_time <= end_time:
-            slot = current_time.strftime('%H:%M')
-            
-            # Check if slot is in the past for today
-            if booking_date == datetime.now().date():
-                slot_datetime = datetime.combine(booking_date, current_time)
-                if slot_datetime <= datetime.now():
-                    current_time = (datetime.combine(datetime.min, current_time) + 
-                                  timedelta(hours=1)).time()
-                    continue
-            
-            all_slots.append({
-                'time': slot,
-                'available': slot not in booked_slots
-            })
-            
-            current_time = (datetime.combine(datetime.min, current_time) + 
-                          timedelta(hours=1)).time()
+    try:
+        # Validate date
+        booking_date = date.fromisoformat(date_param)
+        if booking_date < date.today():
+            return jsonify({'error': 'Cannot check availability for past dates'}), 400
+    except ValueError:
+        return jsonify({'error': 'Invalid date format'}), 400
 
-        return jsonify({
-            'date': date,
-            'service_id': service_id,
-            'time_slots': all_slots
-        }), 200
+    day = booking_date.isoformat()
+    conn = get_db()
+    rows = conn.execute(SQL_TIMESLOTS, (service_id, day, day))
+    
+    all_slots = [{
+        'time': row['slot'],
+        'available': bool(row['available'])
+    } for row in rows]
 
-    except Exception as e:
-        return jsonify({'error': str(e)}), 500
+    return jsonify({
+        'date': date_param,
+        'service_id': service_id,
+        'time_slots': all_slots
+    }), 200
 
 @booking_bp.route('/<int:booking_id>', methods=['GET'])
 def get_booking_details(booking_id):
-    try:
-        conn = sqlite3.connect('home_service.db')
-        c = conn.cursor()
-        
-        # Get booking details with related information
-        c.execute('''
-            SELECT b.*, s.service_title, s.service_image,
-                   u.name as user_name, u.mobile as user_mobile,
-                   p.business_name as provider_name
-            FROM bookings b
-            JOIN services s ON b.service_id = s.id
-            JOIN users u ON b.user_id = u.id
-            JOIN service_providers p ON b.provider_id = p.id
-            WHERE b.id = ?
-        ''', (booking_id,))
-        
-        booking = c.fetchone()
-        conn.close()
-
-        if not booking:
-            return jsonify({'error': 'Booking not found'}), 404
-
-        return jsonify({
-            'booking': {
-                'id': booking[0],
-                'user_id': booking[1],
-                'service_id': booking[2],
-                'provider_id': booking[3],
-                'booking_date': booking[4],
-                'booking_time': booking[5],
-                'status': booking[6],
-                'total_amount': booking[7],
-                'booking_notes': booking[8],
-                'created_at': booking[9],
-                'updated_at': booking[10],
-                'service_title': booking[11],
-                'service_image': booking[12],
-                'user_name': booking[13],
-                'user_mobile': booking[14],
-                'provider_name': booking[15]
-            }
-        }), 200
-
-    except Exception as e:
-        return jsonify({'error': str(e)}), 500
\ No newline at end of file
+    conn = get_db()
+    
+    # Get booking details with related information
+    booking = conn.execute(SQL_BOOKING_DETAILS, (booking_id,)).fetchone()
+
+    if not booking:
+        return jsonify({'error': 'Booking not found'}), 404
+
+    return jsonify({'booking': dict(booking)}), 200
\ No newline at end of file
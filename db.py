@@ -0,0 +1,201 @@
+import os
+import queue
+import sqlite3
+import threading
+from concurrent.futures import Future
+from contextlib import contextmanager
+from functools import wraps
+from flask import g
+
+DATABASE = 'home_service.db'
+POOL_SIZE = int(os.environ.get('DB_POOL_SIZE', 8))
+READ_POOL_SIZE = int(os.environ.get('DB_READ_POOL_SIZE', 8))
+WRITE_BATCH_SIZE = int(os.environ.get('DB_WRITE_BATCH_SIZE', 32))
+# Seconds a request waits for its write; longer than busy_timeout, so a
+# write stuck behind another process's lock fails in the writer first
+WRITE_TIMEOUT = float(os.environ.get('DB_WRITE_TIMEOUT', 60))
+
+# Per-connection pragmas (journal_mode is persistent and set once at init)
+CONNECTION_PRAGMAS = (
+    'PRAGMA busy_timeout = 30000',
+    'PRAGMA synchronous = NORMAL',
+    'PRAGMA temp_store = MEMORY',
+    'PRAGMA cache_size = -65536',
+    'PRAGMA mmap_size = 268435456',
+    'PRAGMA foreign_keys = ON',
+)
+
+def connect(readonly=False):
+    # Pooled connections are handed between worker threads
+    conn = sqlite3.connect(DATABASE, timeout=30, check_same_thread=False,
+                           cached_statements=256)
+    conn.row_factory = sqlite3.Row
+    for pragma in CONNECTION_PRAGMAS:
+        conn.execute(pragma)
+    if readonly:
+        # Any write attempted on this connection fails instead of queueing
+        # behind the writer
+        conn.execute('PRAGMA query_only = ON')
+    return conn
+
+def enable_wal(conn):
+    # WAL lets readers proceed while a writer holds the lock
+    conn.execute('PRAGMA journal_mode = WAL')
+
+class ConnectionPool:
+    def __init__(self, size, readonly=False):
+        self.size = size
+        self.readonly = readonly
+        # LIFO hands out the most recently used, cache-warm connection first
+        self._idle = queue.LifoQueue(maxsize=size)
+        self._created = 0
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+
+        # Open connections lazily up to the pool size, then wait for one
+        with self._lock:
+            if self._created < self.size:
+                conn = connect(self.readonly)
+                self._created += 1
+                return conn
+
+        return self._idle.get()
+
+    def release(self, conn):
+        # Never hand out a connection with a half-finished transaction
+        if conn.in_transaction:
+            conn.rollback()
+        self._idle.put(conn)
+
+    def status(self):
+        idle = self._idle.qsize()
+        return {
+            'size': self.size,
+            'open': self._created,
+            'idle': idle,
+            'in_use': self._created - idle
+        }
+
+pool = ConnectionPool(POOL_SIZE)
+
+# Separate query_only connections for endpoints that never write, so reads
+# don't wait for a connection held by a write
+read_pool = ConnectionPool(READ_POOL_SIZE, readonly=True)
+
+# SQLite allows a single writer; queue writers here instead of inside SQLite
+write_lock = threading.Lock()
+
+@contextmanager
+def transaction(conn):
+    # One write transaction: queue behind other writers, take SQLite's write
+    # lock up front, commit on success and roll back on any error
+    with write_lock:
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            yield conn
+        except BaseException:
+            conn.rollback()
+            raise
+        conn.commit()
+
+def readonly(view):
+    # Mark a view as read-only: get_db() then hands out a read_pool connection
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        g.db_readonly = True
+        return view(*args, **kwargs)
+    return wrapper
+
+def get_db():
+    if 'db' not in g:
+        g.db_pool = read_pool if g.get('db_readonly') else pool
+        g.db = g.db_pool.acquire()
+    return g.db
+
+def close_db(exc=None):
+    conn = g.pop('db', None)
+    if conn is not None:
+        g.pop('db_pool').release(conn)
+
+class BatchWriter:
+    # Single-statement writes submitted from any request thread are applied
+    # by one background thread, up to batch_size per transaction, so
+    # concurrent writers share a commit instead of queueing for one each
+    def __init__(self, batch_size):
+        self.batch_size = batch_size
+        self._queue = queue.Queue()
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def submit(self, sql, params=()):
+        # Returns a Future resolving to the statement's rowcount, or raising
+        # the error it failed with
+        future = Future()
+        self._queue.put((sql, params, future))
+        self._start()
+        return future
+
+    def execute(self, sql, params=()):
+        return self.submit(sql, params).result(timeout=WRITE_TIMEOUT)
+
+    def _start(self):
+        # Started on first use, so each forked worker gets its own thread
+        with self._lock:
+            # Also replaces a writer thread that has died
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name='db-writer', daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        conn = None
+        while True:
+            batch = [self._queue.get()]
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            try:
+                if conn is None:
+                    conn = connect()
+                self._apply(conn, batch)
+            except Exception as e:
+                # Fail what's left of this batch and start over on a fresh
+                # connection rather than letting the thread die
+                self._fail(batch, e)
+                if conn is not None:
+                    try:
+                        conn.close()
+                    except Exception:
+                        pass
+                    conn = None
+
+    def _apply(self, conn, batch):
+        # If the transaction fails to begin or commit, or a savepoint fails,
+        # this raises and _run fails whatever in the batch is still pending;
+        # nothing in the batch was written
+        done = []
+        with transaction(conn):
+            for sql, params, future in batch:
+                # A failing statement only undoes itself, not the batch
+                conn.execute('SAVEPOINT batch_item')
+                try:
+                    done.append((future, conn.execute(sql, params).rowcount))
+                except Exception as e:
+                    conn.execute('ROLLBACK TO batch_item')
+                    future.set_exception(e)
+                conn.execute('RELEASE batch_item')
+        for future, rowcount in done:
+            future.set_result(rowcount)
+
+    def _fail(self, batch, e):
+        for _, _, future in batch:
+            if not future.done():
+                future.set_exception(e)
+
+writer = BatchWriter(WRITE_BATCH_SIZE)
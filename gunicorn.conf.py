@@ -0,0 +1,16 @@
+import multiprocessing
+import os
+
+# Run with: gunicorn main:app (this file is picked up from the working directory)
+# after creating the schema once with: flask --app main init-db
+bind = os.environ.get('GUNICORN_BIND', '0.0.0.0:8000')
+
+# Pre-forked workers, each with a few threads. sqlite3 releases the GIL while
+# a query runs, so threads overlap on I/O without monkeypatching; greenlet
+# workers would instead stall the whole worker on every blocking SQLite call.
+worker_class = 'gthread'
+workers = int(os.environ.get('GUNICORN_WORKERS', multiprocessing.cpu_count() * 2 + 1))
+threads = int(os.environ.get('GUNICORN_THREADS', 4))
+
+# Video report uploads can take a while on slow connections
+timeout = 120
@@ -0,0 +1,68 @@
+import orjson
+from flask import current_app, stream_with_context
+from flask.json.provider import DefaultJSONProvider
+from pagination import page_info
+
+
+class ORJSONProvider(DefaultJSONProvider):
+    # Same output as Flask's default provider, encoded by orjson. Types orjson
+    # doesn't handle natively (e.g. Decimal) still go through Flask's default().
+
+    def _options(self):
+        # The stdlib encoder stringifies int keys, e.g. rating distributions
+        option = orjson.OPT_NON_STR_KEYS
+        if self.sort_keys:
+            option |= orjson.OPT_SORT_KEYS
+        return option
+
+    def dumps(self, obj, **kwargs):
+        return orjson.dumps(obj, default=self.default, option=self._options()).decode()
+
+    def loads(self, s, **kwargs):
+        # Also used by request.get_json(); orjson takes str or bytes directly
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        option = self._options()
+
+        if self.compact is False or (self.compact is None and self._app.debug):
+            option |= orjson.OPT_INDENT_2
+
+        return self._app.response_class(
+            orjson.dumps(obj, default=self.default, option=option),
+            mimetype=self.mimetype
+        )
+
+
+def stream_json_rows(key, cursor, count_key=None, row_to_dict=dict, batch_size=100,
+                     total=None, page=None):
+    # Encode rows as the cursor produces them instead of materializing the
+    # whole list first. stream_with_context keeps the request (and its pooled
+    # connection) alive until the last row has been sent.
+    # count_key gets total when given, else the number of rows sent; a
+    # (limit, offset) page adds the page_info() fields, which need total.
+    def generate():
+        yield b'{"' + key.encode() + b'":['
+        count = 0
+
+        while True:
+            rows = cursor.fetchmany(batch_size)
+            if not rows:
+                break
+            chunk = b','.join(orjson.dumps(row_to_dict(row)) for row in rows)
+            yield chunk if count == 0 else b',' + chunk
+            count += len(rows)
+
+        yield b']'
+        if count_key:
+            yield b',"' + count_key.encode() + b'":' + str(count if total is None else total).encode()
+        if page:
+            for name, value in page_info(*page, count, total).items():
+                yield b',"' + name.encode() + b'":' + orjson.dumps(value)
+        yield b'}'
+
+    return current_app.response_class(
+        stream_with_context(generate()),
+        mimetype='application/json'
+    )
@@ -1,35 +1,46 @@
-from flask import Flask, request, jsonify, send_file, url_for, make_response
+from flask import Flask, Request, request, jsonify, send_from_directory, url_for
 from flask_cors import CORS
 import sqlite3
 import base64
-from werkzeug.security import generate_password_hash, check_password_hash
 from user_routes import user_bp
 from booking_routes import booking_bp
 import os
+import re
+import uuid
+import mimetypes
+import hashlib
+import tempfile
+import threading
 from werkzeug.utils import secure_filename
 from datetime import datetime
+from functools import lru_cache
+from cachetools import TTLCache, cached
+from json_provider import ORJSONProvider, stream_json_rows
+from pagination import page_args, page_info
+from db import connect, enable_wal, get_db, close_db, transaction, readonly, pool, read_pool, writer
+from passwords import hash_password, verify_password, needs_rehash
 
 
 app = Flask(__name__)
+app.json = ORJSONProvider(app)
+# Emit keys in the order handlers build them; sorting every object is the
+# largest remaining cost when encoding the big listing responses
+app.json.sort_keys = False
 CORS(app, resources={
     r"/api/*": {  # This will cover all /api/ routes including blueprints
         "origins": "*",  # Allow all origins
         "methods": ["GET", "POST", "PUT", "DELETE", "OPTIONS", "PATCH"],
         "allow_headers": ["Content-Type", "Authorization"],
-        "supports_credentials": True
+        "supports_credentials": True,
+        "max_age": 86400  # Let browsers reuse preflight results for a day
     }
 })
 
-# Add explicit CORS handling for preflight requests
-@app.before_request
-def handle_preflight():
-    if request.method == "OPTIONS":
-        response = make_response()
-        response.headers.add("Access-Control-Allow-Origin", "*")  # Allow all origins
-        response.headers.add('Access-Control-Allow-Headers', "Content-Type, Authorization")
-        response.headers.add('Access-Control-Allow-Methods', "GET, POST, PUT, DELETE, OPTIONS, PATCH")
-        response.headers.add('Access-Control-Allow-Credentials', 'true')
-        return response
+# Preflight requests are answered by the reverse proxy (see nginx.conf);
+# flask_cors above covers direct requests to the app, e.g. in development
+
+# Return each request's pooled connection once its app context ends
+app.teardown_appcontext(close_db)
 
 # Register blueprints after CORS configuration
 app.register_blueprint(user_bp, url_prefix='/api/user')
@@ -40,16 +51,581 @@ UPLOAD_FOLDER = 'uploads'
 ALLOWED_VIDEO_EXTENSIONS = {'mp4', 'mov', 'avi', 'mkv'}
 MAX_VIDEO_SIZE = 100 * 1024 * 1024  # 100MB
 
-# Create upload directory if it doesn't exist
+# No request body, report videos included, may exceed the video limit
+app.config['MAX_CONTENT_LENGTH'] = MAX_VIDEO_SIZE
+
+@app.before_request
+def reject_oversized_body():
+    # Answer from the Content-Length header before the body is read, and before
+    # a handler's catch-all except could turn Werkzeug's 413 into a 500
+    if request.content_length and request.content_length > app.config['MAX_CONTENT_LENGTH']:
+        return jsonify({'error': 'Request body too large'}), 413
+
+IMAGE_FOLDER = os.path.join(UPLOAD_FOLDER, 'images')
+
+# Internal nginx location mapped onto UPLOAD_FOLDER (see nginx.conf). When set,
+# report videos are handed to nginx with X-Accel-Redirect instead of being
+# streamed by a worker.
+X_ACCEL_UPLOADS = os.environ.get('X_ACCEL_UPLOADS')
+
+# Create upload directories if they don't exist
 os.makedirs(os.path.join(UPLOAD_FOLDER, 'reports'), exist_ok=True)
+os.makedirs(IMAGE_FOLDER, exist_ok=True)
+
+class UploadRequest(Request):
+    # Spool report videos to disk in the reports folder while the body is
+    # parsed, so keeping one is a hard link instead of a second full copy.
+    # The temporary name is removed when the request closes the file. Other
+    # routes' uploads are handled the default way.
+    def _get_file_stream(self, total_content_length, content_type, filename=None, content_length=None):
+        if self.endpoint != 'report_provider':
+            return super()._get_file_stream(total_content_length, content_type, filename, content_length)
+        return tempfile.NamedTemporaryFile('wb+', dir=os.path.join(UPLOAD_FOLDER, 'reports'), suffix='.part')
+
+app.request_class = UploadRequest
+
+# Provider and service queries, shared as constants so each one has a single
+# statement text for the connection's statement cache
+SQL_INSERT_PROVIDER = '''
+    INSERT INTO service_providers 
+    (business_photo, business_name, owner_name, service_category, 
+     custom_category, email, phone_number, password)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+'''
+
+SQL_PROVIDER_LOGIN = '''
+    SELECT id, business_name, business_photo, email, password, 
+           verification_status, verification_notes
+    FROM service_providers 
+    WHERE email = ?
+'''
+
+SQL_UPDATE_PROVIDER_PASSWORD = 'UPDATE service_providers SET password = ? WHERE id = ?'
+
+SQL_PROVIDER_PROFILE = '''
+    SELECT id, business_photo, business_name, owner_name,
+           service_category, custom_category, email, phone_number
+    FROM service_providers 
+    WHERE id = ?
+'''
+
+SQL_PROVIDER_EXISTS = 'SELECT EXISTS(SELECT 1 FROM service_providers WHERE id = ?)'
+
+SQL_PROVIDER_PHOTO = 'SELECT business_photo FROM service_providers WHERE id = ?'
+
+SQL_PROVIDER_VERIFICATION = '''
+    SELECT verification_status 
+    FROM service_providers 
+    WHERE id = ?
+    LIMIT 1
+'''
+
+PROVIDER_LIST_SELECT = '''
+    SELECT id, business_photo, business_name, owner_name, 
+           service_category, custom_category, email, phone_number 
+    FROM service_providers
+'''
+
+SQL_ALL_PROVIDERS = PROVIDER_LIST_SELECT + 'ORDER BY business_name'
+
+# "Other" only matches the main category; anything else may also match a
+# provider's custom category. Both branches can use the category indexes.
+SQL_PROVIDERS_BY_CATEGORY = PROVIDER_LIST_SELECT + '''
+    WHERE service_category = :category
+    OR (:category != 'Other' AND custom_category = :category)
+    ORDER BY business_name
+'''
+
+SQL_INSERT_SERVICE = '''
+    INSERT INTO services 
+    (provider_id, service_image, service_title, category, custom_category,
+     price, duration, description, customer_requirements, 
+     cancellation_policy, status)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+    RETURNING id
+'''
+
+SQL_INSERT_SERVICE_AREA = 'INSERT OR IGNORE INTO service_areas (service_id, area) VALUES (?, ?)'
+
+SQL_DELETE_SERVICE_AREAS = 'DELETE FROM service_areas WHERE service_id = ?'
+
+# A service's areas as one comma-separated column, the shape readers split
+SERVICE_AREAS_SELECT = '(SELECT group_concat(area) FROM service_areas WHERE service_id = s.id) AS service_areas'
+
+# A NULL status parameter means no status filter
+SQL_PROVIDER_SERVICES = f'''
+    SELECT s.id, s.service_image, s.service_title, s.category, s.custom_category,
+           s.price, s.duration, {SERVICE_AREAS_SELECT}, s.description,
+           s.customer_requirements, s.cancellation_policy, s.status, s.created_at
+    FROM services s
+    WHERE s.provider_id = ? AND (? IS NULL OR s.status = ?)
+    ORDER BY s.created_at DESC
+'''
+
+SQL_SERVICE_DETAILS = f'''
+    SELECT s.id, s.provider_id, s.service_image, s.service_title,
+           s.category, s.custom_category, s.price, s.duration,
+           {SERVICE_AREAS_SELECT}, s.description, s.customer_requirements,
+           s.cancellation_policy, s.status, s.total_rating,
+           s.rating_count, s.created_at,
+           p.business_name as provider_name, p.business_photo as provider_photo
+    FROM services s
+    JOIN service_providers p ON s.provider_id = p.id
+    WHERE s.id = ?
+'''
+
+SQL_USER_SERVICE_REVIEW = '''
+    SELECT id, rating, review_text, created_at, images
+    FROM service_reviews 
+    WHERE service_id = ? AND user_id = ?
+'''
+
+SQL_SERVICE_EXISTS = 'SELECT EXISTS(SELECT 1 FROM services WHERE id = ?)'
+
+SQL_SERVICE_IMAGE = 'SELECT service_image FROM services WHERE id = ?'
+
+SQL_DELETE_SERVICE = 'DELETE FROM services WHERE id = ?'
+
+SQL_BOOKING_FOR_REVIEW = '''
+    SELECT service_id, status 
+    FROM bookings 
+    WHERE id = ? AND user_id = ?
+    LIMIT 1
+'''
+
+SQL_BOOKING_REVIEW = '''
+    SELECT id, rating, review_text, created_at, images 
+    FROM service_reviews 
+    WHERE booking_id = ?
+'''
+
+SQL_SEARCH_SERVICES = f'''
+    SELECT s.id, s.provider_id, s.service_image, s.service_title,
+           s.category, s.custom_category, s.price, s.duration,
+           {SERVICE_AREAS_SELECT},
+           s.description, s.customer_requirements, s.cancellation_policy,
+           s.status, s.created_at,
+           p.business_name as provider_name, p.business_photo as provider_photo 
+    FROM services_fts
+    JOIN services s ON s.id = services_fts.rowid
+    JOIN service_providers p ON s.provider_id = p.id
+    WHERE services_fts MATCH ?
+    ORDER BY bm25(services_fts), s.created_at DESC, s.id DESC
+    LIMIT ? OFFSET ?
+'''
+
+SQL_SEARCH_SERVICES_COUNT = '''
+    SELECT COUNT(*)
+    FROM services_fts
+    JOIN services s ON s.id = services_fts.rowid
+    JOIN service_providers p ON s.provider_id = p.id
+    WHERE services_fts MATCH ?
+'''
+
+# Public service listing; get_all_services appends its filters, one of the
+# ORDER BY clauses below and the page bounds
+SERVICE_LIST_SELECT = f'''
+    SELECT 
+        s.id,
+        s.provider_id,
+        s.service_image,
+        s.service_title,
+        s.category,
+        s.custom_category,
+        s.price,
+        s.duration,
+        {SERVICE_AREAS_SELECT},
+        s.description,
+        s.customer_requirements,
+        s.cancellation_policy,
+        s.status,
+        s.total_rating,
+        s.rating_count,
+        s.created_at,
+        p.business_name AS provider_name,
+        p.business_photo AS provider_photo
+    FROM services s
+    LEFT JOIN service_providers p ON s.provider_id = p.id
+'''
+
+# Every service matching get_all_services' filters, for its total
+SERVICE_LIST_COUNT = 'SELECT COUNT(*) FROM services s'
+
+# (sort_by, sort_order) -> ORDER BY; the id tiebreak keeps pages stable
+SERVICE_SORT_COLUMNS = {
+    'created_at': 's.created_at',
+    'price': 's.price',
+    'service_title': 's.service_title'
+}
+SERVICE_LIST_ORDER_BY = {
+    (field, order): f' ORDER BY {column} {order}, s.id {order}'
+    for field, column in SERVICE_SORT_COLUMNS.items()
+    for order in ('ASC', 'DESC')
+}
+
+# Service status, category, rating, review and report queries
+SQL_USER_EXISTS = 'SELECT EXISTS(SELECT 1 FROM users WHERE id = ?)'
+
+# Flip the status in one atomic statement; like Python's truthiness, only 0
+# and '' count as inactive (older rows may hold a status string)
+SQL_TOGGLE_SERVICE_STATUS = '''
+    UPDATE services 
+    SET status = CASE WHEN status = 0 OR status = '' THEN 1 ELSE 0 END
+    WHERE id = ?
+    RETURNING status
+'''
+
+SQL_CUSTOM_CATEGORIES = '''
+    SELECT DISTINCT custom_category 
+    FROM (
+        SELECT custom_category FROM service_providers 
+        WHERE custom_category IS NOT NULL
+        UNION
+        SELECT custom_category FROM services 
+        WHERE custom_category IS NOT NULL
+    )
+    ORDER BY custom_category
+'''
+
+# Inserts nothing unless the provider exists
+SQL_INSERT_PROVIDER_RATING = '''
+    INSERT INTO provider_ratings (provider_id, user_id, rating, review_text)
+    SELECT :provider_id, :user_id, :rating, :review_text
+    WHERE EXISTS (SELECT 1 FROM service_providers WHERE id = :provider_id)
+'''
+
+SQL_PROVIDER_RATING_INFO = '''
+    SELECT total_rating, rating_count 
+    FROM service_providers 
+    WHERE id = ?
+'''
+
+SQL_PROVIDER_AVERAGE_RATING = '''
+    SELECT COALESCE(AVG(r.rating), 0) as average_rating
+    FROM service_providers p
+    LEFT JOIN services s ON p.id = s.provider_id
+    LEFT JOIN service_reviews r ON s.id = r.service_id
+    WHERE p.id = ?
+'''
+
+# Inserts nothing unless both the user and the service exist
+SQL_INSERT_SERVICE_REVIEW = '''
+    INSERT INTO service_reviews 
+    (service_id, user_id, booking_id, rating, review_text, images)
+    SELECT :service_id, :user_id, :booking_id, :rating, :review_text, :images
+    WHERE EXISTS (SELECT 1 FROM users WHERE id = :user_id)
+    AND EXISTS (SELECT 1 FROM services WHERE id = :service_id)
+'''
+
+SQL_SERVICE_RATING_INFO = '''
+    SELECT total_rating, rating_count 
+    FROM services 
+    WHERE id = ?
+'''
+
+SQL_SERVICE_REVIEWS = '''
+    SELECT sr.rating, sr.review_text, sr.images, 
+           sr.review_response, sr.response_date,
+           sr.created_at, u.name as user_name, 
+           u.profile_photo
+    FROM service_reviews sr
+    JOIN users u ON sr.user_id = u.id
+    WHERE sr.service_id = ?
+    ORDER BY sr.created_at DESC, sr.id DESC
+    LIMIT ? OFFSET ?
+'''
+
+SQL_REVIEW_FOR_RESPONSE = '''
+    SELECT sr.id, s.provider_id 
+    FROM service_reviews sr
+    JOIN services s ON sr.service_id = s.id
+    WHERE sr.id = ? AND sr.review_response IS NULL
+'''
+
+SQL_ADD_REVIEW_RESPONSE = '''
+    UPDATE service_reviews 
+    SET review_response = ?, 
+        response_date = CURRENT_TIMESTAMP
+    WHERE id = ?
+'''
+
+SQL_RATING_DISTRIBUTION = '''
+    SELECT rating, COUNT(*) as count
+    FROM service_reviews
+    WHERE service_id = ?
+    GROUP BY rating
+    ORDER BY rating DESC
+'''
+
+SQL_DASHBOARD_STATS = '''
+    SELECT
+        (SELECT COUNT(*) FROM users) AS total_users,
+        (SELECT COUNT(*) 
+         FROM service_providers 
+         WHERE verification_status = 'approved') AS total_providers,
+        (SELECT COUNT(*) 
+         FROM services s
+         JOIN service_providers p ON s.provider_id = p.id
+         WHERE s.status = 1 
+         AND p.verification_status = 'approved') AS total_active_services,
+        (SELECT COUNT(*) 
+         FROM bookings b
+         JOIN service_providers p ON b.provider_id = p.id
+         WHERE b.status = 'completed'
+         AND p.verification_status = 'approved') AS total_completed_services
+'''
+
+SQL_INSERT_PROVIDER_REPORT = '''
+    INSERT INTO provider_reports (
+        provider_id, user_id, reason, description, 
+        video_path, status
+    )
+    VALUES (?, ?, ?, ?, ?, 'pending')
+'''
+
+SQL_REPORT_VIDEO_PATH = 'SELECT video_path FROM provider_reports WHERE id = ?'
+
+SQL_REPORT_DETAILS = '''
+    SELECT pr.*, u.name as reporter_name, u.email as reporter_email,
+           sp.business_name as provider_name
+    FROM provider_reports pr
+    JOIN users u ON pr.user_id = u.id
+    JOIN service_providers sp ON pr.provider_id = sp.id
+    WHERE pr.id = ?
+'''
+
+# Provider row plus report, service and booking statistics in one statement;
+# the report aggregate always yields exactly one row
+SQL_ADMIN_PROVIDER_DETAILS = '''
+    SELECT p.id, p.business_photo, p.business_name, p.owner_name,
+           p.service_category, p.custom_category, p.email, p.phone_number,
+           p.verification_status, p.verification_notes, p.created_at,
+           p.total_rating, p.rating_count,
+           r.report_count, r.pending_reports,
+           (SELECT COUNT(*) FROM services WHERE provider_id = p.id) AS service_count,
+           p.total_bookings, p.completed_bookings, p.cancelled_bookings,
+           CASE WHEN p.service_category = 'Other' AND p.custom_category != ''
+                THEN p.custom_category ELSE p.service_category END AS category_display,
+           CASE WHEN p.total_bookings > 0
+                THEN p.completed_bookings * 100.0 / p.total_bookings ELSE 0 END AS completion_rate
+    FROM service_providers p,
+         (SELECT COUNT(*) AS report_count,
+                 COUNT(CASE WHEN status = 'pending' THEN 1 END) AS pending_reports
+          FROM provider_reports
+          WHERE provider_id = :provider_id) r
+    WHERE p.id = :provider_id
+'''
+
+SQL_PENDING_PROVIDERS = '''
+    SELECT id, business_photo, business_name, owner_name,
+           service_category, custom_category, email, phone_number,
+           verification_status, verification_notes, created_at
+    FROM service_providers
+    WHERE verification_status = 'pending'
+    ORDER BY created_at DESC
+    LIMIT ? OFFSET ?
+'''
+
+SQL_PENDING_PROVIDERS_COUNT = '''
+    SELECT COUNT(*)
+    FROM service_providers
+    WHERE verification_status = 'pending'
+'''
+
+SQL_VERIFY_PROVIDER = '''
+    UPDATE service_providers
+    SET verification_status = ?,
+        verification_notes = ?
+    WHERE id = ?
+'''
+
+SQL_PROVIDER_VERIFICATION_STATUS = '''
+    SELECT verification_status, verification_notes
+    FROM service_providers
+    WHERE id = ?
+'''
+
+SQL_VERIFICATION_COUNTS = '''
+    SELECT
+        verification_status,
+        COUNT(*) as count,
+        COUNT(CASE WHEN created_at >= date('now', '-7 days') THEN 1 END) as last_7_days,
+        COUNT(CASE WHEN created_at >= date('now', '-30 days') THEN 1 END) as last_30_days
+    FROM service_providers
+    GROUP BY verification_status
+'''
+
+SQL_LATEST_PENDING_PROVIDERS = '''
+    SELECT id, business_name, created_at
+    FROM service_providers
+    WHERE verification_status = 'pending'
+    ORDER BY created_at DESC
+    LIMIT 5
+'''
+
+# Completed bookings per month over the first six months of this year; a
+# plain date range so the (status, booking_date) index can serve it
+SQL_MONTHLY_COMPLETED_BOOKINGS = '''
+    SELECT CAST(strftime('%m', booking_date) AS INTEGER) as month_num,
+           COUNT(*) as count
+    FROM bookings
+    WHERE status = 'completed'
+    AND booking_date >= date('now', 'start of year')
+    AND booking_date < date('now', 'start of year', '+6 months')
+    GROUP BY month_num
+'''
+
+# Months reported by the monthly completed bookings chart, in order
+REPORT_MONTHS = ('January', 'February', 'March', 'April', 'May', 'June')
+
+SQL_LATEST_REVIEWS = '''
+    SELECT
+        r.id,
+        r.rating,
+        r.review_text,
+        r.created_at,
+        s.service_title,
+        u.name as user_name,
+        p.business_name as provider_name
+    FROM service_reviews r
+    JOIN services s ON r.service_id = s.id
+    JOIN users u ON r.user_id = u.id
+    JOIN service_providers p ON s.provider_id = p.id
+    ORDER BY r.created_at DESC
+    LIMIT 3
+'''
+
+SQL_TOP_PROVIDERS = '''
+    SELECT
+        p.id,
+        p.business_name,
+        p.business_photo,
+        CASE WHEN p.service_category = 'Other'
+             THEN p.custom_category ELSE p.service_category END as category,
+        p.total_rating,
+        p.rating_count,
+        p.total_bookings,
+        p.completed_bookings
+    FROM service_providers p
+    WHERE p.verification_status = 'approved'
+    ORDER BY p.total_rating DESC, p.rating_count DESC
+    LIMIT 3
+'''
+
+SQL_TOP_SERVICES = '''
+    SELECT
+        s.id,
+        s.service_title,
+        s.service_image,
+        CASE WHEN s.category = 'Other'
+             THEN s.custom_category ELSE s.category END as category,
+        s.price,
+        s.total_rating,
+        s.rating_count,
+        p.business_name as provider_name,
+        s.total_bookings,
+        s.completed_bookings
+    FROM services s
+    JOIN service_providers p ON s.provider_id = p.id
+    WHERE p.verification_status = 'approved'
+    ORDER BY s.total_bookings DESC
+    LIMIT 3
+'''
+
+# Newest bookings and reviews merged, newest first. Each arm takes its own
+# top rows off the created_at index before the merge; columns the other type
+# doesn't have are NULL
+SQL_RECENT_ACTIVITIES = '''
+    SELECT * FROM (
+        SELECT
+            'booking' as type,
+            b.id,
+            b.status,
+            NULL as rating,
+            NULL as review_text,
+            b.booking_date,
+            b.booking_time,
+            u.name as user_name,
+            s.service_title,
+            p.business_name as provider_name,
+            b.created_at
+        FROM bookings b
+        JOIN users u ON b.user_id = u.id
+        JOIN services s ON b.service_id = s.id
+        JOIN service_providers p ON b.provider_id = p.id
+        ORDER BY b.created_at DESC
+        LIMIT :limit
+    )
+    UNION ALL
+    SELECT * FROM (
+        SELECT
+            'review' as type,
+            r.id,
+            NULL as status,
+            r.rating,
+            r.review_text,
+            NULL as booking_date,
+            NULL as booking_time,
+            u.name as user_name,
+            s.service_title,
+            p.business_name as provider_name,
+            r.created_at
+        FROM service_reviews r
+        JOIN users u ON r.user_id = u.id
+        JOIN services s ON r.service_id = s.id
+        JOIN service_providers p ON s.provider_id = p.id
+        ORDER BY r.created_at DESC
+        LIMIT :limit
+    )
+    ORDER BY created_at DESC
+    LIMIT :limit
+'''
+
+# Fields reported for each type of recent activity
+ACTIVITY_FIELDS = {
+    'booking': ('type', 'id', 'status', 'booking_date', 'booking_time',
+                'user_name', 'service_title', 'provider_name', 'created_at'),
+    'review': ('type', 'id', 'rating', 'review_text', 'user_name',
+               'service_title', 'provider_name', 'created_at')
+}
+
+# Search terms are split into words the way the FTS5 tokenizer splits them
+SEARCH_WORD = re.compile(r'\w+')
+
+# ?status= values accepted by the provider services listing, mapped to what is
+# stored: 1/0 for active/inactive, or one of the statuses create_service allows
+SERVICE_STATUS_FILTERS = {
+    '1': 1,
+    '0': 0,
+    'pending': 'pending',
+    'approved': 'approved',
+    'completed': 'completed',
+    'cancelled': 'cancelled',
+    'paid_deposit': 'paid_deposit'
+}
 
 def allowed_video_file(filename):
     return '.' in filename and \
            filename.rsplit('.', 1)[1].lower() in ALLOWED_VIDEO_EXTENSIONS
 
+# Recorded in PRAGMA user_version by init_db; bump it whenever init_db
+# changes so existing databases get the new schema on their next start
+SCHEMA_VERSION = 10
+
+# Per-status booking counts denormalized onto services and providers
+BOOKING_COUNTERS = ('total_bookings', 'completed_bookings', 'cancelled_bookings')
+
+# Tables whose writes bump their row in data_versions, so listings built from
+# them can be revalidated without re-running the listing query
+VERSIONED_TABLES = (
+    'service_providers', 'services', 'service_areas',
+    'service_reviews', 'provider_reports', 'users'
+)
+
 # Updated database initialization
 def init_db():
-    conn = sqlite3.connect('home_service.db')
+    conn = connect()
+    enable_wal(conn)
     c = conn.cursor()
     
     # Existing Service Providers table with added verification status
@@ -68,6 +644,9 @@ def init_db():
             verification_notes TEXT,
             total_rating DECIMAL(3,2) DEFAULT NULL,
             rating_count INTEGER DEFAULT 0,
+            total_bookings INTEGER NOT NULL DEFAULT 0,
+            completed_bookings INTEGER NOT NULL DEFAULT 0,
+            cancelled_bookings INTEGER NOT NULL DEFAULT 0,
             created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
         )
     ''')
@@ -83,18 +662,50 @@ def init_db():
             custom_category TEXT,
             price DECIMAL(10,2) NOT NULL,
             duration TEXT NOT NULL,
-            service_areas TEXT NOT NULL,
             description TEXT NOT NULL,
             customer_requirements TEXT NOT NULL,
             cancellation_policy TEXT NOT NULL,
             status BOOLEAN NOT NULL DEFAULT 1,
             total_rating DECIMAL(3,2) DEFAULT NULL,
             rating_count INTEGER DEFAULT 0,
+            total_bookings INTEGER NOT NULL DEFAULT 0,
+            completed_bookings INTEGER NOT NULL DEFAULT 0,
+            cancelled_bookings INTEGER NOT NULL DEFAULT 0,
             created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
             FOREIGN KEY (provider_id) REFERENCES service_providers (id)
         )
     ''')
     
+    # Booking counters kept up to date by the triggers further down; add
+    # them to tables created before they existed
+    for table in ('service_providers', 'services'):
+        columns = {column['name'] for column in c.execute(f'PRAGMA table_info({table})')}
+        for column in BOOKING_COUNTERS:
+            if column not in columns:
+                c.execute(f'ALTER TABLE {table} ADD COLUMN {column} INTEGER NOT NULL DEFAULT 0')
+    
+    # Areas each service covers, one row per area
+    c.execute('''
+        CREATE TABLE IF NOT EXISTS service_areas (
+            service_id INTEGER NOT NULL,
+            area TEXT NOT NULL COLLATE NOCASE,
+            PRIMARY KEY (service_id, area),
+            FOREIGN KEY (service_id) REFERENCES services (id) ON DELETE CASCADE
+        ) WITHOUT ROWID
+    ''')
+    c.execute('''CREATE INDEX IF NOT EXISTS idx_service_areas_area 
+                 ON service_areas (area, service_id)''')
+    
+    # Move areas out of the comma-separated column older databases still have
+    if any(column['name'] == 'service_areas' for column in c.execute('PRAGMA table_info(services)')):
+        services = c.execute('SELECT id, service_areas FROM services').fetchall()
+        c.executemany(SQL_INSERT_SERVICE_AREA, [
+            (service_id, area)
+            for service_id, areas in services if areas
+            for area in areas.split(',') if area
+        ])
+        c.execute('ALTER TABLE services DROP COLUMN service_areas')
+    
     # New table for Provider Ratings
     c.execute('''
         CREATE TABLE IF NOT EXISTS provider_ratings (
@@ -151,31 +762,316 @@ def init_db():
     # Create indexes for better query performance
     c.execute('''CREATE INDEX IF NOT EXISTS idx_provider_ratings_provider 
                  ON provider_ratings (provider_id)''')
-    c.execute('''CREATE INDEX IF NOT EXISTS idx_service_reviews_service 
-                 ON service_reviews (service_id)''')
     c.execute('''CREATE INDEX IF NOT EXISTS idx_service_reviews_user 
                  ON service_reviews (user_id)''')
-    c.execute('''CREATE INDEX IF NOT EXISTS idx_provider_reports_provider 
-                 ON provider_reports (provider_id)''')
     
+    # A service's reviews newest first, and reports filtered by provider
+    # and status newest first
+    c.execute('''CREATE INDEX IF NOT EXISTS idx_service_reviews_service_created 
+                 ON service_reviews (service_id, created_at DESC)''')
+    c.execute('''CREATE INDEX IF NOT EXISTS idx_provider_reports_provider_status_created 
+                 ON provider_reports (provider_id, status, created_at DESC)''')
+    
+    # Superseded by the composite indexes above
+    c.execute('DROP INDEX IF EXISTS idx_service_reviews_service')
+    c.execute('DROP INDEX IF EXISTS idx_provider_reports_provider')
+    
+    # Provider listing filters on either category column and sorts by name
+    c.execute('''CREATE INDEX IF NOT EXISTS idx_sp_category 
+                 ON service_providers (service_category, business_name)''')
+    c.execute('''CREATE INDEX IF NOT EXISTS idx_sp_custom_category 
+                 ON service_providers (custom_category, business_name)''')
+    
+    # A provider's services, newest first or filtered by status
+    c.execute('''CREATE INDEX IF NOT EXISTS idx_services_provider_created 
+                 ON services (provider_id, created_at DESC)''')
+    c.execute('''CREATE INDEX IF NOT EXISTS idx_services_provider_status 
+                 ON services (provider_id, status)''')
+    
+    # Verified-provider counts on the dashboard and admin pages, and the
+    # admin queue of pending providers newest first
+    c.execute('''CREATE INDEX IF NOT EXISTS idx_sp_verification_created 
+                 ON service_providers (verification_status, created_at DESC)''')
+    c.execute('DROP INDEX IF EXISTS idx_sp_verification_status')
+    
+    # Latest reviews and recent activity across all services
+    c.execute('''CREATE INDEX IF NOT EXISTS idx_service_reviews_created 
+                 ON service_reviews (created_at DESC)''')
+    
+    # Most booked services first
+    c.execute('''CREATE INDEX IF NOT EXISTS idx_services_total_bookings 
+                 ON services (total_bookings DESC)''')
+    
+    # Public service listing filtered by status and category, newest first
+    c.execute('''CREATE INDEX IF NOT EXISTS idx_services_status_category_created 
+                 ON services (status, category, created_at DESC)''')
+    
+    # Full-text index over the searchable service columns, kept in sync with
+    # services by the triggers below (external content, so no text is copied)
+    c.execute('''
+        CREATE VIRTUAL TABLE IF NOT EXISTS services_fts USING fts5(
+            service_title, description, category, custom_category,
+            content='services', content_rowid='id'
+        )
+    ''')
+    c.execute('''
+        CREATE TRIGGER IF NOT EXISTS services_ai AFTER INSERT ON services BEGIN
+            INSERT INTO services_fts (rowid, service_title, description, category, custom_category)
+            VALUES (new.id, new.service_title, new.description, new.category, new.custom_category);
+        END
+    ''')
+    c.execute('''
+        CREATE TRIGGER IF NOT EXISTS services_ad AFTER DELETE ON services BEGIN
+            INSERT INTO services_fts (services_fts, rowid, service_title, description, category, custom_category)
+            VALUES ('delete', old.id, old.service_title, old.description, old.category, old.custom_category);
+        END
+    ''')
+    c.execute('''
+        CREATE TRIGGER IF NOT EXISTS services_au
+        AFTER UPDATE OF service_title, description, category, custom_category ON services BEGIN
+            INSERT INTO services_fts (services_fts, rowid, service_title, description, category, custom_category)
+            VALUES ('delete', old.id, old.service_title, old.description, old.category, old.custom_category);
+            INSERT INTO services_fts (rowid, service_title, description, category, custom_category)
+            VALUES (new.id, new.service_title, new.description, new.category, new.custom_category);
+        END
+    ''')
+    # Index any services that existed before the table did
+    c.execute("INSERT INTO services_fts (services_fts) VALUES ('rebuild')")
+    
+    conn.commit()
+    
+    # Keep the denormalized rating average and count on services and
+    # providers in step with every review/rating write. The triggers adjust
+    # them by the one rating that changed rather than re-aggregating, so
+    # start from an exact baseline.
+    rating_events = (
+        ('insert', 'INSERT', 'NEW', '''
+            rating_count = rating_count + 1,
+            total_rating = (COALESCE(total_rating, 0) * rating_count + NEW.rating) * 1.0 / (rating_count + 1)'''),
+        ('delete', 'DELETE', 'OLD', '''
+            rating_count = rating_count - 1,
+            total_rating = CASE WHEN rating_count > 1
+                THEN (total_rating * rating_count - OLD.rating) * 1.0 / (rating_count - 1) END'''),
+        ('update', 'UPDATE OF rating', 'NEW', '''
+            total_rating = total_rating + (NEW.rating - OLD.rating) * 1.0 / rating_count'''),
+    )
+    for source, target, key in (('service_reviews', 'services', 'service_id'),
+                                ('provider_ratings', 'service_providers', 'provider_id')):
+        c.execute(f'''
+            UPDATE {target}
+            SET total_rating = (SELECT AVG(rating) FROM {source} WHERE {key} = {target}.id),
+                rating_count = (SELECT COUNT(*) FROM {source} WHERE {key} = {target}.id)
+        ''')
+        for name, event, row, assignments in rating_events:
+            c.execute(f'DROP TRIGGER IF EXISTS trg_{source}_{name}')
+            c.execute(f'''
+                CREATE TRIGGER trg_{source}_{name}
+                AFTER {event} ON {source}
+                BEGIN
+                    UPDATE {target}
+                    SET {assignments}
+                    WHERE id = {row}.{key};
+                END
+            ''')
+    
+    # Same for the booking counters on services and providers: a row counts
+    # towards the provider and service it belongs to, and towards
+    # completed/cancelled while it has that status
+    booking_events = (
+        ('insert', 'INSERT', (('NEW', '+'),)),
+        ('delete', 'DELETE', (('OLD', '-'),)),
+        ('update', 'UPDATE OF status, service_id, provider_id', (('OLD', '-'), ('NEW', '+'))),
+    )
+    for target, key in (('service_providers', 'provider_id'), ('services', 'service_id')):
+        c.execute(f'''
+            UPDATE {target}
+            SET total_bookings = (SELECT COUNT(*) FROM bookings WHERE {key} = {target}.id),
+                completed_bookings = (SELECT COUNT(*) FROM bookings
+                                      WHERE {key} = {target}.id AND status = 'completed'),
+                cancelled_bookings = (SELECT COUNT(*) FROM bookings
+                                      WHERE {key} = {target}.id AND status = 'cancelled')
+        ''')
+        for name, event, changes in booking_events:
+            updates = ''.join(f'''
+                    UPDATE {target}
+                    SET total_bookings = total_bookings {sign} 1,
+                        completed_bookings = completed_bookings {sign} ({row}.status = 'completed'),
+                        cancelled_bookings = cancelled_bookings {sign} ({row}.status = 'cancelled')
+                    WHERE id = {row}.{key};''' for row, sign in changes)
+            c.execute(f'DROP TRIGGER IF EXISTS trg_bookings_{target}_{name}')
+            c.execute(f'''
+                CREATE TRIGGER trg_bookings_{target}_{name}
+                AFTER {event} ON bookings
+                BEGIN{updates}
+                END
+            ''')
+    
+    c.execute('''
+        CREATE TABLE IF NOT EXISTS data_versions (
+            name TEXT PRIMARY KEY,
+            version INTEGER NOT NULL DEFAULT 0
+        ) WITHOUT ROWID
+    ''')
+    for table in VERSIONED_TABLES:
+        c.execute('INSERT OR IGNORE INTO data_versions (name) VALUES (?)', (table,))
+        for event in ('INSERT', 'UPDATE', 'DELETE'):
+            c.execute(f'''
+                CREATE TRIGGER IF NOT EXISTS trg_{table}_version_{event.lower()}
+                AFTER {event} ON {table}
+                BEGIN
+                    UPDATE data_versions SET version = version + 1 WHERE name = '{table}';
+                END
+            ''')
     conn.commit()
+    
+    # Refresh planner statistics so the new indexes get picked up
+    c.execute('ANALYZE')
+    c.execute(f'PRAGMA user_version = {SCHEMA_VERSION}')
     conn.close()
 
-# Initialize database on startup
-init_db()
+def schema_is_current():
+    conn = connect()
+    try:
+        return conn.execute('PRAGMA user_version').fetchone()[0] >= SCHEMA_VERSION
+    finally:
+        conn.close()
+
+# Run once before starting the workers: flask --app main init-db
+@app.cli.command('init-db')
+def init_db_command():
+    init_db()
+
+# Initialize database on startup, unless it already has the current schema
+if not schema_is_current():
+    init_db()
+
+# Standard base64 alphabet with at most two padding characters at the end
+BASE64_DATA = re.compile(r'[A-Za-z0-9+/]*={0,2}')
+
+# Image types accepted in data URIs, with the extension they are saved
+# under. Raster formats only: an SVG can carry script and would run on the
+# API's origin when served back.
+IMAGE_EXTENSIONS = {
+    'image/png': '.png',
+    'image/jpeg': '.jpg',
+    'image/gif': '.gif',
+    'image/webp': '.webp'
+}
+
+def image_mime_type(base64_string):
+    header = base64_string.partition(',')[0]
+    return header[len('data:'):].split(';')[0].lower()
 
 def validate_base64_image(base64_string):
-    try:
-        # Check if the string starts with data:image
-        if not base64_string.startswith('data:image'):
-            return False
-        # Extract the actual base64 data after the comma
-        image_data = base64_string.split(',')[1]
-        # Try to decode it
-        base64.b64decode(image_data)
-        return True
-    except Exception:
+    # Check if the string is a data URI of an accepted image type
+    if not isinstance(base64_string, str) or not base64_string.startswith('data:'):
+        return False
+    if image_mime_type(base64_string) not in IMAGE_EXTENSIONS:
         return False
+    # Extract the actual base64 data after the comma
+    image_data = base64_string.partition(',')[2]
+    # Check its shape without decoding; save_base64_image does the one decode
+    return (bool(image_data) and len(image_data) % 4 == 0
+            and BASE64_DATA.fullmatch(image_data) is not None)
+
+# Decode a validated base64 data URI into uploads/images and return the URL
+# it is served from; that URL is what gets stored instead of the image itself
+def save_base64_image(base64_string):
+    image_data = base64_string.split(',', 1)[1]
+    extension = IMAGE_EXTENSIONS[image_mime_type(base64_string)]
+    filename = f'{uuid.uuid4().hex}{extension}'
+    
+    with open(os.path.join(IMAGE_FOLDER, filename), 'wb') as f:
+        f.write(base64.b64decode(image_data))
+    
+    return url_for('get_image', filename=filename)
+
+# Delete the file behind a URL returned by save_base64_image. Anything else
+# (None, or an image still stored inline as a data URI) has no file to remove.
+def remove_image(url):
+    if not isinstance(url, str):
+        return
+    filename = url.rpartition('/api/images/')[2]
+    if filename == url or '/' in filename:
+        return
+    try:
+        os.unlink(os.path.join(IMAGE_FOLDER, filename))
+    except FileNotFoundError:
+        pass
+
+# Uploaded images get a fresh random name, so they can be cached indefinitely.
+# They are user content on the API's origin: never let a browser sniff them
+# into something active, or run anything they might contain.
+@app.route('/api/images/<path:filename>', methods=['GET'])
+def get_image(filename):
+    response = send_from_directory(IMAGE_FOLDER, filename, max_age=31536000)
+    response.headers['X-Content-Type-Options'] = 'nosniff'
+    response.headers['Content-Security-Policy'] = "default-src 'none'"
+    return response
+
+# Connection usage of both pools, for spotting exhaustion under load
+@app.route('/pool-health', methods=['GET'])
+def pool_health():
+    return jsonify({
+        'write_pool': pool.status(),
+        'read_pool': read_pool.status()
+    }), 200
+
+# Columns the update endpoints may set, per table
+UPDATABLE_COLUMNS = {
+    'service_providers': frozenset({
+        'business_name', 'owner_name', 'service_category', 'custom_category',
+        'phone_number', 'business_photo'
+    }),
+    'services': frozenset({
+        'service_title', 'category', 'custom_category', 'price', 'duration',
+        'description', 'customer_requirements', 'cancellation_policy',
+        'service_image'
+    })
+}
+
+# One statement text per (table, sorted columns) so repeat updates of the same
+# fields hit the connection's statement cache instead of being re-parsed
+@lru_cache(maxsize=256)
+def update_sql(table, columns):
+    if not UPDATABLE_COLUMNS[table].issuperset(columns):
+        raise ValueError(f'Cannot update columns {sorted(set(columns) - UPDATABLE_COLUMNS[table])} of {table}')
+    return f"UPDATE {table} SET {', '.join(f'{column} = ?' for column in columns)} WHERE id = ?"
+
+# Seconds clients and shared caches may reuse public read responses
+CACHE_MAX_AGE = 60
+
+def cache_for(response, private=False):
+    if private:
+        response.cache_control.private = True
+    else:
+        response.cache_control.public = True
+    response.cache_control.max_age = CACHE_MAX_AGE
+    return response
+
+# JSON response that caches may keep for CACHE_MAX_AGE and then revalidate by
+# ETag; a matching If-None-Match gets an empty 304 instead of the body
+def cached_json(data, private=False):
+    response = cache_for(jsonify(data), private)
+    response.add_etag()
+    return response.make_conditional(request)
+
+SQL_DATA_VERSIONS = 'SELECT name, version FROM data_versions'
+
+# ETag for a listing read from the given tables, known before running the
+# listing query: it changes whenever any of those tables is written
+def listing_etag(*tables):
+    versions = dict(get_db().execute(SQL_DATA_VERSIONS).fetchall())
+    key = ' '.join(f'{table}:{versions.get(table, 0)}' for table in tables)
+    return hashlib.md5(f'{key} {request.full_path}'.encode()).hexdigest()
+
+# Empty 304 if the client already holds this ETag, otherwise None
+def not_modified(etag, private=False):
+    if etag not in request.if_none_match:
+        return None
+    response = cache_for(app.response_class(status=304), private)
+    response.set_etag(etag)
+    return response
 
 # Updated provider registration endpoint
 @app.route('/api/provider/register', methods=['POST'])
@@ -200,32 +1096,34 @@ def register_provider():
             if not custom_category:
                 return jsonify({'error': 'Custom category is required when selecting Other'}), 400
 
-        # Hash password
-        hashed_password = generate_password_hash(data['password'])
+        # Hash password before touching the database
+        hashed_password = hash_password(data['password'])
 
         # Store in database
-        conn = sqlite3.connect('home_service.db')
+        business_photo = save_base64_image(data['business_photo'])
+        conn = get_db()
         c = conn.cursor()
         
-        c.execute('''
-            INSERT INTO service_providers 
-            (business_photo, business_name, owner_name, service_category, 
-             custom_category, email, phone_number, password)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-        ''', (
-            data['business_photo'],
-            data['business_name'],
-            data['owner_name'],
-            data['service_category'],
-            custom_category,
-            data['email'],
-            data['phone_number'],
-            hashed_password
-        ))
-        
-        conn.commit()
+        # A failed insert (e.g. a taken email) must not leave the photo behind
+        try:
+            c.execute(SQL_INSERT_PROVIDER, (
+                business_photo,
+                data['business_name'],
+                data['owner_name'],
+                data['service_category'],
+                custom_category,
+                data['email'],
+                data['phone_number'],
+                hashed_password
+            ))
+            conn.commit()
+        except Exception:
+            remove_image(business_photo)
+            raise
         provider_id = c.lastrowid
-        conn.close()
+        if custom_category:
+            invalidate_categories()
+        invalidate_verification_counts()
 
         return jsonify({
             'message': 'Service provider registered successfully',
@@ -245,26 +1143,25 @@ def provider_login():
         if not data or 'email' not in data or 'password' not in data:
             return jsonify({'error': 'Email and password are required'}), 400
 
-        conn = sqlite3.connect('home_service.db')
+        conn = get_db()
         c = conn.cursor()
         
         # Get provider with verification status
-        c.execute('''
-            SELECT id, business_name, business_photo, email, password, 
-                   verification_status, verification_notes
-            FROM service_providers 
-            WHERE email = ?
-        ''', (data['email'],))
+        c.execute(SQL_PROVIDER_LOGIN, (data['email'],))
         
         provider = c.fetchone()
-        conn.close()
         
         if not provider:
             return jsonify({'error': 'Provider not found'}), 404
             
         # Verify password
-        if not check_password_hash(provider[4], data['password']):
+        if not verify_password(provider[4], data['password']):
             return jsonify({'error': 'Invalid password'}), 401
+        
+        # Upgrade older hashes now that the plain password is known
+        if needs_rehash(provider[4]):
+            c.execute(SQL_UPDATE_PROVIDER_PASSWORD, (hash_password(data['password']), provider[0]))
+            conn.commit()
             
         # Check verification status
         verification_status = provider[5]
@@ -291,33 +1188,33 @@ def provider_login():
         return jsonify({'error': str(e)}), 500
 
 @app.route('/api/provider/profile/<int:provider_id>', methods=['GET'])
+@readonly
 def get_provider_profile(provider_id):
     try:
-        conn = sqlite3.connect('home_service.db')
+        conn = get_db()
         c = conn.cursor()
         
-        c.execute('SELECT * FROM service_providers WHERE id = ?', (provider_id,))
+        c.execute(SQL_PROVIDER_PROFILE, (provider_id,))
         provider = c.fetchone()
-        conn.close()
 
         if not provider:
             return jsonify({'error': 'Provider not found'}), 404
 
-        category_display = provider[4]  # Default to main category
-        if provider[4] == 'Other' and provider[5]:  # If category is "Other" and custom_category exists
-            category_display = provider[5]
-
-        return jsonify({
-            'id': provider[0],
-            'business_photo': provider[1],
-            'business_name': provider[2],
-            'owner_name': provider[3],
-            'service_category': provider[4],
-            'custom_category': provider[5],
+        category_display = provider['service_category']  # Default to main category
+        if provider['service_category'] == 'Other' and provider['custom_category']:  # If category is "Other" and custom_category exists
+            category_display = provider['custom_category']
+
+        return cached_json({
+            'id': provider['id'],
+            'business_photo': provider['business_photo'],
+            'business_name': provider['business_name'],
+            'owner_name': provider['owner_name'],
+            'service_category': provider['service_category'],
+            'custom_category': provider['custom_category'],
             'category_display': category_display,
-            'email': provider[6],
-            'phone_number': provider[7]
-        }), 200
+            'email': provider['email'],
+            'phone_number': provider['phone_number']
+        })
 
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -326,14 +1223,6 @@ def get_provider_profile(provider_id):
 def update_provider(provider_id):
     try:
         data = request.get_json()
-        conn = sqlite3.connect('home_service.db')
-        c = conn.cursor()
-        
-        # Check if provider exists
-        c.execute('SELECT * FROM service_providers WHERE id = ?', (provider_id,))
-        if not c.fetchone():
-            conn.close()
-            return jsonify({'error': 'Provider not found'}), 404
 
         update_fields = {}
         field_mapping = {
@@ -359,249 +1248,259 @@ def update_provider(provider_id):
         if 'business_photo' in data:
             if not validate_base64_image(data['business_photo']):
                 return jsonify({'error': 'Invalid image format'}), 400
-            update_fields['business_photo'] = data['business_photo']
+            update_fields['business_photo'] = save_base64_image(data['business_photo'])
+        new_photo = update_fields.get('business_photo')
+        old_photo = None
 
+        conn = get_db()
+        c = conn.cursor()
+
+        # The UPDATE's row count doubles as the existence check
         if update_fields:
-            query = 'UPDATE service_providers SET '
-            query += ', '.join(f'{key} = ?' for key in update_fields.keys())
-            query += ' WHERE id = ?'
-            
-            c.execute(query, (*update_fields.values(), provider_id))
-            conn.commit()
+            columns = tuple(sorted(update_fields))
+            try:
+                with transaction(conn):
+                    # Read the photo being replaced under the same write lock
+                    if new_photo:
+                        row = c.execute(SQL_PROVIDER_PHOTO, (provider_id,)).fetchone()
+                        old_photo = row and row[0]
+                    c.execute(update_sql('service_providers', columns),
+                              (*(update_fields[column] for column in columns), provider_id))
+                    found = c.rowcount > 0
+            except Exception:
+                remove_image(new_photo)
+                raise
+            if 'custom_category' in update_fields:
+                invalidate_categories()
+        else:
+            c.execute(SQL_PROVIDER_EXISTS, (provider_id,))
+            found = bool(c.fetchone()[0])
 
-        conn.close()
+        if not found:
+            remove_image(new_photo)
+            return jsonify({'error': 'Provider not found'}), 404
+
+        remove_image(old_photo)
         return jsonify({'message': 'Provider updated successfully'}), 200
 
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+def provider_list_item(provider):
+    category_display = provider['service_category']  # Default to main category
+    if provider['service_category'] == 'Other' and provider['custom_category']:  # If category is "Other" and custom_category exists
+        category_display = provider['custom_category']
+
+    return {
+        'id': provider['id'],
+        'business_photo': provider['business_photo'],
+        'business_name': provider['business_name'],
+        'owner_name': provider['owner_name'],
+        'service_category': provider['service_category'],
+        'custom_category': provider['custom_category'],
+        'category_display': category_display,
+        'email': provider['email'],
+        'phone_number': provider['phone_number']
+    }
+
 @app.route('/api/providers', methods=['GET'])
+@readonly
 def get_all_providers():
     try:
-        conn = sqlite3.connect('home_service.db')
-        c = conn.cursor()
+        conn = get_db()
         
         # Optional query parameters for filtering
         category = request.args.get('category')
         
         if category:
-            if category == 'Other':
-                c.execute('''
-                    SELECT id, business_photo, business_name, owner_name, 
-                           service_category, custom_category, email, phone_number 
-                    FROM service_providers 
-                    WHERE service_category = ?
-                    ORDER BY business_name
-                ''', (category,))
-            else:
-                c.execute('''
-                    SELECT id, business_photo, business_name, owner_name, 
-                           service_category, custom_category, email, phone_number 
-                    FROM service_providers 
-                    WHERE service_category = ? OR custom_category = ?
-                    ORDER BY business_name
-                ''', (category, category))
+            providers = conn.execute(SQL_PROVIDERS_BY_CATEGORY, {'category': category})
         else:
-            c.execute('''
-                SELECT id, business_photo, business_name, owner_name, 
-                       service_category, custom_category, email, phone_number 
-                FROM service_providers
-                ORDER BY business_name
-            ''')
-            
-        providers = c.fetchall()
-        conn.close()
-
-        providers_list = []
-        for provider in providers:
-            category_display = provider[4]  # Default to main category
-            if provider[4] == 'Other' and provider[5]:  # If category is "Other" and custom_category exists
-                category_display = provider[5]
-
-            providers_list.append({
-                'id': provider[0],
-                'business_photo': provider[1],
-                'business_name': provider[2],
-                'owner_name': provider[3],
-                'service_category': provider[4],
-                'custom_category': provider[5],
-                'category_display': category_display,
-                'email': provider[6],
-                'phone_number': provider[7]
-            })
+            providers = conn.execute(SQL_ALL_PROVIDERS)
 
-        return jsonify({
-            'total_providers': len(providers_list),
-            'providers': providers_list
-        }), 200
+        # Stream the rows straight from the cursor
+        response = stream_json_rows('providers', providers, count_key='total_providers',
+                                    row_to_dict=provider_list_item)
+        # Streamed, so there is no body to hash for an ETag; rely on max-age
+        response.cache_control.public = True
+        response.cache_control.max_age = CACHE_MAX_AGE
+        return response, 200
 
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
-# Updated service creation endpoint
+SERVICE_REQUIRED_FIELDS = [
+    'provider_id', 'service_image', 'service_title', 'category', 
+    'price', 'duration', 'service_areas', 'description', 
+    'customer_requirements', 'cancellation_policy'
+]
+
+# Validate one service payload; returns (insert params, None) or (None, error)
+def service_insert_params(data):
+    for field in SERVICE_REQUIRED_FIELDS:
+        if field not in data:
+            return None, f'{field} is required'
+
+    # Check if custom category is provided when category is "Other"
+    custom_category = None
+    if data['category'] == 'Other':
+        custom_category = data.get('custom_category')
+        if not custom_category:
+            return None, 'Custom category is required when selecting Other'
+
+    # Validate base64 image
+    if not validate_base64_image(data['service_image']):
+        return None, 'Invalid image format'
+
+    # Validate service areas
+    if not isinstance(data['service_areas'], list) or not data['service_areas']:
+        return None, 'At least one service area is required'
+
+    # Get status with default True (active)
+    status = data.get('status', True)
+    if status not in [True, 'pending', 'approved', 'completed', 'cancelled', 'paid_deposit']:
+        return None, 'Invalid status'
+
+    return (
+        data['provider_id'],
+        data['service_image'],
+        data['service_title'],
+        data['category'],
+        custom_category,
+        float(data['price']),
+        data['duration'],
+        data['description'],
+        data['customer_requirements'],
+        data['cancellation_policy'],
+        status
+    ), None
+
+# Updated service creation endpoint; also accepts a list of services, which
+# are created together in a single transaction
 @app.route('/api/services/create', methods=['POST'])
 def create_service():
     try:
-        data = request.get_json()
-        
-        # First check if provider is verified
-        conn = sqlite3.connect('home_service.db')
-        c = conn.cursor()
-        
-        c.execute('''
-            SELECT verification_status 
-            FROM service_providers 
-            WHERE id = ?
-        ''', (data['provider_id'],))
-        
-        provider = c.fetchone()
-        
-        if not provider:
-            conn.close()
-            return jsonify({'error': 'Provider not found'}), 404            
-        if provider[0] != 'approved':
-            conn.close()
-            return jsonify({
-                'error': 'Provider not verified',
-                'verification_status': provider[0]
-            }), 403
-
-        required_fields = [
-            'provider_id', 'service_image', 'service_title', 'category', 
-            'price', 'duration', 'service_areas', 'description', 
-            'customer_requirements', 'cancellation_policy'
-        ]
+        payload = request.get_json()
+        services = payload if isinstance(payload, list) else [payload]
         
-        for field in required_fields:
-            if field not in data:
-                return jsonify({'error': f'{field} is required'}), 400
-
-        # Check if custom category is provided when category is "Other"
-        custom_category = None
-        if data['category'] == 'Other':
-            custom_category = data.get('custom_category')
-            if not custom_category:
-                return jsonify({'error': 'Custom category is required when selecting Other'}), 400
-
-        # Validate base64 image
-        if not validate_base64_image(data['service_image']):
-            return jsonify({'error': 'Invalid image format'}), 400
-
-        # Validate service areas
-        if not isinstance(data['service_areas'], list) or not data['service_areas']:
-            return jsonify({'error': 'At least one service area is required'}), 400
+        if not services:
+            return jsonify({'error': 'At least one service is required'}), 400
 
-        # Get status with default True (active)
-        status = data.get('status', True)
-        if status not in [True, 'pending', 'approved', 'completed', 'cancelled', 'paid_deposit']:
-            return jsonify({'error': 'Invalid status'}), 400
+        rows = []
+        for data in services:
+            params, error = service_insert_params(data)
+            if error:
+                return jsonify({'error': error}), 400
+            rows.append((params, data['service_areas']))
 
-        # Store in database
-        c.execute('''
-            INSERT INTO services 
-            (provider_id, service_image, service_title, category, custom_category,
-             price, duration, service_areas, description, customer_requirements, 
-             cancellation_policy, status)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-        ''', (
-            data['provider_id'],
-            data['service_image'],
-            data['service_title'],
-            data['category'],
-            custom_category,
-            float(data['price']),
-            data['duration'],
-            ','.join(data['service_areas']),
-            data['description'],
-            data['customer_requirements'],
-            data['cancellation_policy'],
-            status
-        ))
+        # Check that every provider is verified
+        conn = get_db()
+        c = conn.cursor()
         
-        conn.commit()
-        service_id = c.lastrowid
-        conn.close()
+        for provider_id in {params[0] for params, _ in rows}:
+            c.execute(SQL_PROVIDER_VERIFICATION, (provider_id,))
+            
+            provider = c.fetchone()
+            
+            if not provider:
+                return jsonify({'error': 'Provider not found'}), 404            
+            if provider[0] != 'approved':
+                return jsonify({
+                    'error': 'Provider not verified',
+                    'verification_status': provider[0]
+                }), 403
+
+        # Store in database, with each image saved as a file; if anything
+        # fails, remove the images saved so far
+        images = []
+        service_ids = []
+        try:
+            for params, _ in rows:
+                images.append(save_base64_image(params[1]))
+            rows = [((params[0], image) + params[2:], areas)
+                    for (params, areas), image in zip(rows, images)]
+            with transaction(conn):
+                for params, areas in rows:
+                    service_id = conn.execute(SQL_INSERT_SERVICE, params).fetchone()[0]
+                    conn.executemany(SQL_INSERT_SERVICE_AREA, [(service_id, area) for area in areas])
+                    service_ids.append(service_id)
+        except Exception:
+            for image in images:
+                remove_image(image)
+            raise
+        invalidate_categories()
+
+        if not isinstance(payload, list):
+            return jsonify({
+                'message': 'Service created successfully',
+                'service_id': service_ids[0],
+                'status': rows[0][0][-1]
+            }), 201
 
         return jsonify({
-            'message': 'Service created successfully',
-            'service_id': service_id,
-            'status': status
+            'message': 'Services created successfully',
+            'services': [
+                {'service_id': service_id, 'status': params[-1]}
+                for service_id, (params, _) in zip(service_ids, rows)
+            ]
         }), 201
 
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+def provider_service_item(service):
+    category_display = service['category']  # Default to main category
+    if service['category'] == 'Other' and service['custom_category']:  # If category is "Other" and custom_category exists
+        category_display = service['custom_category']
+
+    return {
+        'id': service['id'],
+        'service_image': service['service_image'],
+        'service_title': service['service_title'],
+        'category': service['category'],
+        'custom_category': service['custom_category'],
+        'category_display': category_display,
+        'price': service['price'],
+        'duration': service['duration'],
+        'service_areas': service['service_areas'].split(',') if service['service_areas'] else [],
+        'description': service['description'],
+        'customer_requirements': service['customer_requirements'],
+        'cancellation_policy': service['cancellation_policy'],
+        'status': bool(service['status']),
+        'created_at': service['created_at']
+    }
+
 # Get provider services with status
 @app.route('/api/services/provider/<int:provider_id>', methods=['GET'])
+@readonly
 def get_provider_services(provider_id):
     try:
-        conn = sqlite3.connect('home_service.db')
+        conn = get_db()
         c = conn.cursor()
         
         # Optional status filter
         status = request.args.get('status')
+        if status is not None and status not in SERVICE_STATUS_FILTERS:
+            return jsonify({'error': 'Invalid status'}), 400
+        status = SERVICE_STATUS_FILTERS.get(status)
         
-        query = '''
-            SELECT * FROM services 
-            WHERE provider_id = ?
-        '''
-        params = [provider_id]
-
-        if status is not None:
-            query += ' AND status = ?'
-            params.append(int(status))
-
-        query += ' ORDER BY created_at DESC'
-        
-        c.execute(query, params)
-        services = c.fetchall()
-        conn.close()
-
-        services_list = []
-        for service in services:
-            category_display = service[4]  # Default to main category
-            if service[4] == 'Other' and service[5]:  # If category is "Other" and custom_category exists
-                category_display = service[5]
-
-            services_list.append({
-                'id': service[0],
-                'service_image': service[2],
-                'service_title': service[3],
-                'category': service[4],
-                'custom_category': service[5],
-                'category_display': category_display,
-                'price': service[6],
-                'duration': service[7],
-                'service_areas': service[8].split(','),
-                'description': service[9],
-                'customer_requirements': service[10],
-                'cancellation_policy': service[11],
-                'status': bool(service[12]),
-                'created_at': service[13]
-            })
-
-        return jsonify({
-            'total_services': len(services_list),
-            'services': services_list
-        }), 200
+        # Stream the rows straight from the cursor
+        services = c.execute(SQL_PROVIDER_SERVICES, (provider_id, status, status))
+        return stream_json_rows('services', services, count_key='total_services',
+                                row_to_dict=provider_service_item), 200
 
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 @app.route('/api/services/<int:service_id>', methods=['GET'])
+@readonly
 def get_service_details(service_id):
     try:
         user_id = request.args.get('user_id', type=int)  # Get user_id from query parameters
-        conn = sqlite3.connect('home_service.db')
+        conn = get_db()
         c = conn.cursor()
         
         # Get service details with provider info
-        c.execute('''
-            SELECT s.*, p.business_name as provider_name, p.business_photo as provider_photo
-            FROM services s
-            JOIN service_providers p ON s.provider_id = p.id
-            WHERE s.id = ?
-        ''', (service_id,))
+        c.execute(SQL_SERVICE_DETAILS, (service_id,))
         
         service = c.fetchone()
         
@@ -611,22 +1510,18 @@ def get_service_details(service_id):
         # Get user's review status if user_id is provided
         user_review_status = None
         if user_id:
-            c.execute('''
-                SELECT id, rating, review_text, created_at, images
-                FROM service_reviews 
-                WHERE service_id = ? AND user_id = ?
-            ''', (service_id, user_id))
+            c.execute(SQL_USER_SERVICE_REVIEW, (service_id, user_id))
             user_review = c.fetchone()
             
             if user_review:
                 user_review_status = {
                     'has_reviewed': True,
                     'review_details': {
-                        'review_id': user_review[0],
-                        'rating': user_review[1],
-                        'review_text': user_review[2],
-                        'created_at': user_review[3],
-                        'images': user_review[4].split(',') if user_review[4] else []
+                        'review_id': user_review['id'],
+                        'rating': user_review['rating'],
+                        'review_text': user_review['review_text'],
+                        'created_at': user_review['created_at'],
+                        'images': user_review['images'].split(',') if user_review['images'] else []
                     }
                 }
             else:
@@ -635,63 +1530,59 @@ def get_service_details(service_id):
                 }
 
         # Determine category display
-        category_display = service[4]  # Default to main category
-        if service[4] == 'Other' and service[5]:  # If category is "Other" and custom_category exists
-            category_display = service[5]
+        category_display = service['category']  # Default to main category
+        if service['category'] == 'Other' and service['custom_category']:  # If category is "Other" and custom_category exists
+            category_display = service['custom_category']
 
         # Build response data
         response_data = {
-            'id': service[0],
-            'provider_id': service[1],
-            'service_image': service[2],
-            'service_title': service[3],
-            'category': service[4],
-            'custom_category': service[5],
+            'id': service['id'],
+            'provider_id': service['provider_id'],
+            'service_image': service['service_image'],
+            'service_title': service['service_title'],
+            'category': service['category'],
+            'custom_category': service['custom_category'],
             'category_display': category_display,
-            'price': service[6],
-            'duration': service[7],
-            'service_areas': service[8].split(','),
-            'description': service[9],
-            'customer_requirements': service[10],
-            'cancellation_policy': service[11],
-            'status': bool(service[12]),
-            'total_rating': service[13],
-            'rating_count': service[14],
-            'created_at': service[15],
-            'provider_name': service[16],
-            'provider_photo': service[17]
+            'price': service['price'],
+            'duration': service['duration'],
+            'service_areas': service['service_areas'].split(',') if service['service_areas'] else [],
+            'description': service['description'],
+            'customer_requirements': service['customer_requirements'],
+            'cancellation_policy': service['cancellation_policy'],
+            'status': bool(service['status']),
+            'total_rating': service['total_rating'],
+            'rating_count': service['rating_count'],
+            'created_at': service['created_at'],
+            'provider_name': service['provider_name'],
+            'provider_photo': service['provider_photo']
         }
         
         # Add user review status if available
         if user_review_status is not None:
             response_data['user_review_status'] = user_review_status
 
-        return jsonify(response_data), 200
+        # The user's own review status makes the response per-user
+        return cached_json(response_data, private=user_review_status is not None)
 
     except Exception as e:
         return jsonify({'error': str(e)}), 500
-    finally:
-        conn.close()
         
 @app.route('/api/booking/<int:booking_id>/user/<int:user_id>/review-status', methods=['GET'])
+@readonly
 def check_user_review_status(booking_id, user_id):
     try:
-        conn = sqlite3.connect('home_service.db')
+        conn = get_db()
         c = conn.cursor()
         
         # First check if booking exists and belongs to the user
-        c.execute('''
-            SELECT b.id, b.service_id, b.status, b.user_id 
-            FROM bookings b
-            WHERE b.id = ? AND b.user_id = ?
-        ''', (booking_id, user_id))
+        c.execute(SQL_BOOKING_FOR_REVIEW, (booking_id, user_id))
         booking = c.fetchone()
         
         if not booking:
             return jsonify({'error': 'Booking not found or unauthorized'}), 404
             
         # Check if booking is completed
-        if booking[2] != 'completed':
+        if booking['status'] != 'completed':
             return jsonify({
                 'has_reviewed': False,
                 'can_review': False,
@@ -699,11 +1590,7 @@ def check_user_review_status(booking_id, user_id):
             }), 200
         
         # Check if review exists for this booking
-        c.execute('''
-            SELECT id, rating, review_text, created_at, images 
-            FROM service_reviews 
-            WHERE booking_id = ?
-        ''', (booking_id,))
+        c.execute(SQL_BOOKING_REVIEW, (booking_id,))
         
         review = c.fetchone()
         
@@ -724,26 +1611,16 @@ def check_user_review_status(booking_id, user_id):
                 'has_reviewed': False,
                 'can_review': True,
                 'booking_id': booking_id,
-                'service_id': booking[1]
+                'service_id': booking['service_id']
             }), 200
 
     except Exception as e:
         return jsonify({'error': str(e)}), 500
-    finally:
-        conn.close()
         
 @app.route('/api/services/update/<int:service_id>', methods=['PUT'])
 def update_service(service_id):
     try:
         data = request.get_json()
-        conn = sqlite3.connect('home_service.db')
-        c = conn.cursor()
-        
-        # Check if service exists
-        c.execute('SELECT * FROM services WHERE id = ?', (service_id,))
-        if not c.fetchone():
-            conn.close()
-            return jsonify({'error': 'Service not found'}), 404
 
         update_fields = {}
         field_mapping = {
@@ -774,20 +1651,52 @@ def update_service(service_id):
                 return jsonify({'error': 'Invalid image format'}), 400
             update_fields['service_image'] = data['service_image']
 
+        service_areas = None
         if 'service_areas' in data:
             if not isinstance(data['service_areas'], list) or not data['service_areas']:
                 return jsonify({'error': 'At least one service area is required'}), 400
-            update_fields['service_areas'] = ','.join(data['service_areas'])
+            service_areas = data['service_areas']
 
-        if update_fields:
-            query = 'UPDATE services SET '
-            query += ', '.join(f'{key} = ?' for key in update_fields.keys())
-            query += ' WHERE id = ?'
-            
-            c.execute(query, (*update_fields.values(), service_id))
-            conn.commit()
+        if 'service_image' in update_fields:
+            update_fields['service_image'] = save_base64_image(update_fields['service_image'])
+        new_image = update_fields.get('service_image')
+        old_image = None
 
-        conn.close()
+        conn = get_db()
+        c = conn.cursor()
+
+        try:
+            with transaction(conn):
+                # Read the image being replaced under the same write lock
+                if new_image:
+                    row = c.execute(SQL_SERVICE_IMAGE, (service_id,)).fetchone()
+                    old_image = row and row[0]
+
+                # The UPDATE's row count doubles as the existence check
+                if update_fields:
+                    columns = tuple(sorted(update_fields))
+                    c.execute(update_sql('services', columns),
+                              (*(update_fields[column] for column in columns), service_id))
+                    found = c.rowcount > 0
+                else:
+                    c.execute(SQL_SERVICE_EXISTS, (service_id,))
+                    found = bool(c.fetchone()[0])
+
+                # Replace the service's areas
+                if found and service_areas is not None:
+                    c.execute(SQL_DELETE_SERVICE_AREAS, (service_id,))
+                    c.executemany(SQL_INSERT_SERVICE_AREA, [(service_id, area) for area in service_areas])
+        except Exception:
+            remove_image(new_image)
+            raise
+
+        if not found:
+            remove_image(new_image)
+            return jsonify({'error': 'Service not found'}), 404
+
+        if 'custom_category' in update_fields:
+            invalidate_categories()
+        remove_image(old_image)
         return jsonify({'message': 'Service updated successfully'}), 200
 
     except Exception as e:
@@ -796,22 +1705,21 @@ def update_service(service_id):
 @app.route('/api/services/delete/<int:service_id>', methods=['DELETE'])
 def delete_service(service_id):
     try:
-        conn = sqlite3.connect('home_service.db')
+        conn = get_db()
         c = conn.cursor()
         
-        # Check if service exists
-        c.execute('SELECT * FROM services WHERE id = ?', (service_id,))
-        if not c.fetchone():
-            conn.close()
-            return jsonify({'error': 'Service not found'}), 404
-
-        # Delete the service
-        c.execute('DELETE FROM services WHERE id = ?', (service_id,))
+        # Delete the service; no deleted row means it didn't exist
+        c.execute(SQL_DELETE_SERVICE, (service_id,))
         conn.commit()
-        conn.close()
+        
+        if c.rowcount == 0:
+            return jsonify({'error': 'Service not found'}), 404
 
+        invalidate_categories()
         return jsonify({'message': 'Service deleted successfully'}), 200
 
+    except sqlite3.IntegrityError:
+        return jsonify({'error': 'Service has bookings or reviews and cannot be deleted'}), 409
     except Exception as e:
         return jsonify({'error': str(e)}), 500
     
@@ -819,24 +1727,18 @@ def delete_service(service_id):
 @app.route('/api/services/<int:service_id>/toggle-status', methods=['PUT'])
 def toggle_service_status(service_id):
     try:
-        conn = sqlite3.connect('home_service.db')
+        conn = get_db()
         c = conn.cursor()
         
-        # Check if service exists and get current status
-        c.execute('SELECT status FROM services WHERE id = ?', (service_id,))
+        # Toggle the status; no returned row means the service doesn't exist
+        c.execute(SQL_TOGGLE_SERVICE_STATUS, (service_id,))
         result = c.fetchone()
+        conn.commit()
         
         if not result:
-            conn.close()
             return jsonify({'error': 'Service not found'}), 404
 
-        # Toggle the status
-        new_status = not bool(result[0])
-        
-        c.execute('UPDATE services SET status = ? WHERE id = ?', 
-                 (new_status, service_id))
-        conn.commit()
-        conn.close()
+        new_status = bool(result[0])
 
         return jsonify({
             'message': 'Service status updated successfully',
@@ -847,158 +1749,115 @@ def toggle_service_status(service_id):
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+# Columns are selected under their response names; only the derived
+# fields need touching up
+def service_list_item(service):
+    item = dict(service)
+    item['category_display'] = service['category']  # Default to main category
+    if service['category'] == 'Other' and service['custom_category']:  # If category is "Other" and custom_category exists
+        item['category_display'] = service['custom_category']
+    item['service_areas'] = service['service_areas'].split(',') if service['service_areas'] else []
+    item['status'] = bool(service['status'])
+    return item
+
 # Modified get all services endpoint to include custom category
 @app.route('/api/services', methods=['GET'])
+@readonly
 def get_all_services():
     try:
-        conn = sqlite3.connect('home_service.db')
+        # Numeric filters, rejected up front when malformed
+        args = request.args
+        try:
+            min_price = float(args['min_price']) if args.get('min_price') else None
+            max_price = float(args['max_price']) if args.get('max_price') else None
+            status = int(args['status']) if 'status' in args else None
+        except ValueError:
+            return jsonify({'error': 'min_price and max_price must be numbers and status an integer'}), 400
+
+        conn = get_db()
         c = conn.cursor()
         
-        base_query = '''
-            SELECT 
-                s.id,
-                s.provider_id,
-                s.service_image,
-                s.service_title,
-                s.category,
-                s.custom_category,
-                s.price,
-                s.duration,
-                s.service_areas,
-                s.description,
-                s.customer_requirements,
-                s.cancellation_policy,
-                s.status,
-                s.total_rating,
-                s.rating_count,
-                s.created_at,
-                p.business_name,
-                p.business_photo
-            FROM services s
-            LEFT JOIN service_providers p ON s.provider_id = p.id
-            WHERE 1=1
-        '''
+        etag = listing_etag('services', 'service_areas', 'service_providers')
+        unchanged = not_modified(etag)
+        if unchanged:
+            return unchanged
         
+        # Optional filters, each one clause plus its parameters
+        clauses = []
         params = []
         
-        # Optional filters
         category = request.args.get('category')
         if category:
             if category == 'Other':
-                base_query += ' AND s.category = "Other"'
+                clauses.append("s.category = 'Other'")
             else:
-                base_query += ' AND (s.category = ? OR (s.category = "Other" AND s.custom_category = ?))'
+                clauses.append("(s.category = ? OR (s.category = 'Other' AND s.custom_category = ?))")
                 params.extend([category, category])
 
         area = request.args.get('area')
         if area:
-            base_query += ' AND s.service_areas LIKE ?'
-            params.append(f'%{area}%')
+            clauses.append('s.id IN (SELECT service_id FROM service_areas WHERE area LIKE ?)')
+            params.append(f'{area}%')
         
-        min_price = request.args.get('min_price')
-        if min_price:
-            base_query += ' AND s.price >= ?'
-            params.append(float(min_price))
+        if min_price is not None:
+            clauses.append('s.price >= ?')
+            params.append(min_price)
         
-        max_price = request.args.get('max_price')
-        if max_price:
-            base_query += ' AND s.price <= ?'
-            params.append(float(max_price))
+        if max_price is not None:
+            clauses.append('s.price <= ?')
+            params.append(max_price)
         
-        status = request.args.get('status')
         if status is not None:
-            base_query += ' AND s.status = ?'
-            params.append(int(status))
-        
-        # Add sorting
-        sort_by = request.args.get('sort_by', 'created_at')
-        sort_order = request.args.get('sort_order', 'DESC')
-        
-        valid_sort_fields = {
-            'created_at': 's.created_at',
-            'price': 's.price',
-            'service_title': 's.service_title'
-        }
-        
-        valid_sort_orders = ['ASC', 'DESC']
+            clauses.append('s.status = ?')
+            params.append(status)
         
-        if sort_by in valid_sort_fields and sort_order in valid_sort_orders:
-            base_query += f' ORDER BY {valid_sort_fields[sort_by]} {sort_order}'
-        else:
-            base_query += ' ORDER BY s.created_at DESC'
-
-        # Execute query
-        c.execute(base_query, params)
-        services = c.fetchall()
+        # Unknown sort fields or orders fall back to newest first
+        order_by = SERVICE_LIST_ORDER_BY.get(
+            (request.args.get('sort_by', 'created_at'), request.args.get('sort_order', 'DESC')),
+            SERVICE_LIST_ORDER_BY[('created_at', 'DESC')]
+        )
         
-        # Process results
-        services_list = []
-        for service in services:
-            # Determine category display
-            category = service[4]  # category
-            custom_category = service[5]  # custom_category
-            category_display = custom_category if category == 'Other' and custom_category else category
-            
-            service_dict = {
-                'id': service[0],
-                'provider_id': service[1],
-                'service_image': service[2],
-                'service_title': service[3],
-                'category': category,
-                'custom_category': custom_category,
-                'category_display': category_display,
-                'price': service[6],
-                'duration': service[7],
-                'service_areas': service[8].split(',') if service[8] else [],
-                'description': service[9],
-                'customer_requirements': service[10],
-                'cancellation_policy': service[11],
-                'status': bool(service[12]),
-                'total_rating': service[13],
-                'rating_count': service[14],
-                'created_at': service[15],
-                'provider_name': service[16],
-                'provider_photo': service[17]
-            }
-            services_list.append(service_dict)
+        where = ' WHERE ' + ' AND '.join(clauses) if clauses else ''
+        total = conn.execute(SERVICE_LIST_COUNT + where, params).fetchone()[0]
 
-        return jsonify({
-            'total_services': len(services_list),
-            'services': services_list
-        }), 200
+        # Stream the rows straight from the cursor
+        limit, offset = page_args()
+        services = c.execute(SERVICE_LIST_SELECT + where + order_by + ' LIMIT ? OFFSET ?',
+                             (*params, limit, offset))
+        response = stream_json_rows('services', services, count_key='total_services',
+                                    row_to_dict=service_list_item,
+                                    total=total, page=(limit, offset))
+        response.set_etag(etag)
+        return cache_for(response), 200
 
     except Exception as e:
         print(f"Error in get_all_services: {str(e)}")  # Debug log
         return jsonify({'error': str(e)}), 500
-    finally:
-        conn.close()
 
 # Search services
 @app.route('/api/services/search', methods=['GET'])
+@readonly
 def search_services():
     try:
         search_term = request.args.get('q', '')
         if not search_term:
             return jsonify({'error': 'Search term is required'}), 400
 
-        conn = sqlite3.connect('home_service.db')
-        c = conn.cursor()
+        # Every word must match the start of a word in one of the indexed
+        # columns; quoting keeps FTS5 query syntax out of user input
+        words = SEARCH_WORD.findall(search_term)
         
-        query = '''
-            SELECT s.*, p.business_name as provider_name, p.business_photo as provider_photo 
-            FROM services s
-            JOIN service_providers p ON s.provider_id = p.id
-            WHERE s.service_title LIKE ? 
-            OR s.description LIKE ? 
-            OR s.category LIKE ?
-            OR s.custom_category LIKE ?
-            ORDER BY s.created_at DESC
-        '''
+        conn = get_db()
+        c = conn.cursor()
         
-        search_pattern = f'%{search_term}%'
-        c.execute(query, (search_pattern, search_pattern, search_pattern, search_pattern))
-        services = c.fetchall()
-        conn.close()
+        limit, offset = page_args()
+        services = []
+        total = 0
+        if words:
+            match = ' '.join(f'"{word}"*' for word in words)
+            total = c.execute(SQL_SEARCH_SERVICES_COUNT, (match,)).fetchone()[0]
+            c.execute(SQL_SEARCH_SERVICES, (match, limit, offset))
+            services = c.fetchall()
 
         services_list = []
         for service in services:
@@ -1016,7 +1875,7 @@ def search_services():
                 'category_display': category_display,
                 'price': service[6],
                 'duration': service[7],
-                'service_areas': service[8].split(','),
+                'service_areas': service[8].split(',') if service[8] else [],
                 'description': service[9],
                 'customer_requirements': service[10],
                 'cancellation_policy': service[11],
@@ -1027,46 +1886,49 @@ def search_services():
             })
 
         return jsonify({
-            'total_results': len(services_list),
-            'services': services_list
+            'total_results': total,
+            'services': services_list,
+            **page_info(limit, offset, len(services_list), total)
         }), 200
 
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+PREDEFINED_CATEGORIES = (
+    'Carpenter', 'Cleaner', 'Painter', 'Electrician', 
+    'AC Repair', 'Plumber', "Men's Salon", "Other"
+)
+
+# The custom category list changes rarely; keep it per process for a few
+# minutes, and drop it whenever a write may have added or removed a category
+CATEGORIES_TTL = 300
+categories_cache = TTLCache(maxsize=1, ttl=CATEGORIES_TTL)
+categories_lock = threading.Lock()
+
+@cached(categories_cache, lock=categories_lock)
+def load_custom_categories():
+    c = get_db().cursor()
+    
+    # Get unique custom categories from both providers and services
+    c.execute(SQL_CUSTOM_CATEGORIES)
+    return tuple(row[0] for row in c.fetchall())
+
+def invalidate_categories():
+    with categories_lock:
+        categories_cache.clear()
+
 @app.route('/api/categories', methods=['GET'])
+@readonly
 def get_categories():
     try:
-        # Predefined categories
-        predefined_categories = [
-            'Carpenter', 'Cleaner', 'Painter', 'Electrician', 
-            'AC Repair', 'Plumber', "Men's Salon", "Other"
-        ]
-        
-        # Get custom categories from the database
-        conn = sqlite3.connect('home_service.db')
-        c = conn.cursor()
-        
-        # Get unique custom categories from both providers and services
-        c.execute('''
-            SELECT DISTINCT custom_category 
-            FROM (
-                SELECT custom_category FROM service_providers 
-                WHERE custom_category IS NOT NULL
-                UNION
-                SELECT custom_category FROM services 
-                WHERE custom_category IS NOT NULL
-            )
-            ORDER BY custom_category
-        ''')
-        
-        custom_categories = [row[0] for row in c.fetchall()]
-        conn.close()
+        # Custom categories from the database, cached
+        custom_categories = load_custom_categories()
 
-        return jsonify({
-            'predefined_categories': predefined_categories,
+        # The body comes from the cache, so hashing it for the ETag is cheap
+        return cached_json({
+            'predefined_categories': PREDEFINED_CATEGORIES,
             'custom_categories': custom_categories
-        }), 200
+        })
 
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -1088,46 +1950,25 @@ def add_provider_rating(provider_id):
         if rating < 1 or rating > 5:
             return jsonify({'error': 'Rating must be between 1 and 5'}), 400
 
-        conn = sqlite3.connect('home_service.db')
+        conn = get_db()
         c = conn.cursor()
         
-        # Check if provider exists
-        c.execute('SELECT id FROM service_providers WHERE id = ?', (provider_id,))
-        if not c.fetchone():
-            conn.close()
-            return jsonify({'error': 'Provider not found'}), 404
-
         try:
-            # Insert new rating
-            c.execute('''
-                INSERT INTO provider_ratings (provider_id, user_id, rating, review_text)
-                VALUES (?, ?, ?, ?)
-            ''', (provider_id, data['user_id'], rating, data.get('review_text')))
-            
-            # Update provider's total rating and count
-            c.execute('''
-                UPDATE service_providers 
-                SET total_rating = (
-                    SELECT AVG(rating) 
-                    FROM provider_ratings 
-                    WHERE provider_id = ?
-                ),
-                rating_count = (
-                    SELECT COUNT(*) 
-                    FROM provider_ratings 
-                    WHERE provider_id = ?
-                )
-                WHERE id = ?
-            ''', (provider_id, provider_id, provider_id))
+            # Insert new rating if the provider exists; the provider's total
+            # rating and count are kept up to date by trigger
+            c.execute(SQL_INSERT_PROVIDER_RATING, {
+                'provider_id': provider_id,
+                'user_id': data['user_id'],
+                'rating': rating,
+                'review_text': data.get('review_text')
+            })
+            if c.rowcount == 0:
+                return jsonify({'error': 'Provider not found'}), 404
             
             conn.commit()
             
             # Get updated rating info
-            c.execute('''
-                SELECT total_rating, rating_count 
-                FROM service_providers 
-                WHERE id = ?
-            ''', (provider_id,))
+            c.execute(SQL_PROVIDER_RATING_INFO, (provider_id,))
             rating_info = c.fetchone()
             
             return jsonify({
@@ -1136,31 +1977,26 @@ def add_provider_rating(provider_id):
                 'rating_count': rating_info[1]
             }), 201
             
-        except sqlite3.IntegrityError:
+        except sqlite3.IntegrityError as e:
+            # foreign_keys is enforced on pooled connections
+            if 'FOREIGN KEY' in str(e):
+                return jsonify({'error': 'User not found'}), 404
             # Handle case where user has already rated this provider
             return jsonify({'error': 'User has already rated this provider'}), 409
             
     except Exception as e:
         return jsonify({'error': str(e)}), 500
-    finally:
-        conn.close()
 
 @app.route('/api/provider/<int:provider_id>/rating', methods=['GET'])
+@readonly
 def get_provider_rating(provider_id):
     try:
-        conn = sqlite3.connect('home_service.db')
+        conn = get_db()
         c = conn.cursor()
         
-        c.execute('''
-            SELECT COALESCE(AVG(r.rating), 0) as average_rating
-            FROM service_providers p
-            LEFT JOIN services s ON p.id = s.provider_id
-            LEFT JOIN service_reviews r ON s.id = r.service_id
-            WHERE p.id = ?
-        ''', (provider_id,))
+        c.execute(SQL_PROVIDER_AVERAGE_RATING, (provider_id,))
         
         average_rating = round(c.fetchone()[0], 1)
-        conn.close()
 
         return jsonify({
             'average_rating': average_rating
@@ -1176,15 +2012,6 @@ def add_service_review(service_id):
     try:
         data = request.get_json()
         print("Received data:", data)
-        # Check if user exists first
-        conn = sqlite3.connect('home_service.db')
-        c = conn.cursor()
-        
-        c.execute('SELECT id FROM users WHERE id = ?', (data['user_id'],))
-        user = c.fetchone()
-        if not user:
-            conn.close()
-            return jsonify({'error': 'User not found'}), 404
         required_fields = ['user_id', 'rating']
         
         for field in required_fields:
@@ -1205,99 +2032,73 @@ def add_service_review(service_id):
                 if not validate_base64_image(image):
                     return jsonify({'error': 'Invalid image format'}), 400
 
-        conn = sqlite3.connect('home_service.db')
+        conn = get_db()
         c = conn.cursor()
-        
-        # Check if service exists
-        c.execute('SELECT id FROM services WHERE id = ?', (service_id,))
-        if not c.fetchone():
-            conn.close()
-            return jsonify({'error': 'Service not found'}), 404
 
         try:
-            # Insert new review
-            c.execute('''
-                INSERT INTO service_reviews 
-                (service_id, user_id, booking_id, rating, review_text, images)
-                VALUES (?, ?, ?, ?, ?, ?)
-            ''', (
-                service_id, 
-                data['user_id'],
-                data.get('booking_id'),
-                rating,
-                data.get('review_text'),
-                ','.join(images) if images else None
-            ))
-            
-            # Update service's total rating and count
-            c.execute('''
-                UPDATE services 
-                SET total_rating = (
-                    SELECT AVG(rating) 
-                    FROM service_reviews 
-                    WHERE service_id = ?
-                ),
-                rating_count = (
-                    SELECT COUNT(*) 
-                    FROM service_reviews 
-                    WHERE service_id = ?
-                )
-                WHERE id = ?
-            ''', (service_id, service_id, service_id))
-            
-            conn.commit()
-            
-            # Get updated rating info
-            c.execute('''
-                SELECT total_rating, rating_count 
-                FROM services 
-                WHERE id = ?
-            ''', (service_id,))
-            rating_info = c.fetchone()
+            # Insert new review, checking the user and service in the same
+            # statement; the service's total rating and count are kept up to
+            # date by trigger and read back in the same transaction
+            with transaction(conn):
+                c.execute(SQL_INSERT_SERVICE_REVIEW, {
+                    'service_id': service_id,
+                    'user_id': data['user_id'],
+                    'booking_id': data.get('booking_id'),
+                    'rating': rating,
+                    'review_text': data.get('review_text'),
+                    'images': ','.join(images) if images else None
+                })
+                inserted = c.rowcount > 0
+                if inserted:
+                    c.execute(SQL_SERVICE_RATING_INFO, (service_id,))
+                    rating_info = c.fetchone()
             
-            return jsonify({
-                'message': 'Review added successfully',
-                'total_rating': rating_info[0],
-                'rating_count': rating_info[1]
-            }), 201
-            
-        except sqlite3.IntegrityError:
+        except sqlite3.IntegrityError as e:
+            # foreign_keys is enforced on pooled connections; user and service
+            # were checked by the insert, so this is the booking
+            if 'FOREIGN KEY' in str(e):
+                return jsonify({'error': 'Booking not found'}), 404
             # Handle case where user has already reviewed this service booking
             return jsonify({'error': 'User has already reviewed this service booking'}), 409
+
+        if not inserted:
+            # Only on failure: find out which of the two is missing
+            c.execute(SQL_USER_EXISTS, (data['user_id'],))
+            if not c.fetchone()[0]:
+                return jsonify({'error': 'User not found'}), 404
+            return jsonify({'error': 'Service not found'}), 404
+
+        return jsonify({
+            'message': 'Review added successfully',
+            'total_rating': rating_info[0],
+            'rating_count': rating_info[1]
+        }), 201
             
     except Exception as e:
         return jsonify({'error': str(e)}), 500
-    finally:
-        conn.close()
 
 @app.route('/api/service/<int:service_id>/reviews', methods=['GET'])
+@readonly
 def get_service_reviews(service_id):
     try:
-        conn = sqlite3.connect('home_service.db')
+        conn = get_db()
         c = conn.cursor()
         
-        # Get service's overall rating
-        c.execute('''
-            SELECT total_rating, rating_count 
-            FROM services 
-            WHERE id = ?
-        ''', (service_id,))
+        # Get service's overall rating; checked before the ETag so a missing
+        # service is a 404 even on a conditional request
+        c.execute(SQL_SERVICE_RATING_INFO, (service_id,))
         rating_info = c.fetchone()
         
         if not rating_info:
             return jsonify({'error': 'Service not found'}), 404
         
+        etag = listing_etag('services', 'service_reviews', 'users')
+        unchanged = not_modified(etag)
+        if unchanged:
+            return unchanged
+        
         # Get detailed reviews
-        c.execute('''
-            SELECT sr.rating, sr.review_text, sr.images, 
-                   sr.review_response, sr.response_date,
-                   sr.created_at, u.name as user_name, 
-                   u.profile_photo
-            FROM service_reviews sr
-            JOIN users u ON sr.user_id = u.id
-            WHERE sr.service_id = ?
-            ORDER BY sr.created_at DESC
-        ''', (service_id,))
+        c.execute(SQL_SERVICE_REVIEWS, (service_id, *page_args()))
         reviews = c.fetchall()
         
         reviews_list = [{
@@ -1311,16 +2112,16 @@ def get_service_reviews(service_id):
             'user_photo': review[7]
         } for review in reviews]
         
-        return jsonify({
+        response = jsonify({
             'total_rating': rating_info[0],
             'rating_count': rating_info[1],
             'reviews': reviews_list
-        }), 200
+        })
+        response.set_etag(etag)
+        return cache_for(response), 200
         
     except Exception as e:
         return jsonify({'error': str(e)}), 500
-    finally:
-        conn.close()
 
 @app.route('/api/service/review/<int:review_id>/response', methods=['POST'])
 def add_review_response(review_id):
@@ -1329,35 +2130,23 @@ def add_review_response(review_id):
         if 'response' not in data:
             return jsonify({'error': 'Response text is required'}), 400
 
-        conn = sqlite3.connect('home_service.db')
+        conn = get_db()
         c = conn.cursor()
         
         # Check if review exists and hasn't been responded to
-        c.execute('''
-            SELECT sr.id, s.provider_id 
-            FROM service_reviews sr
-            JOIN services s ON sr.service_id = s.id
-            WHERE sr.id = ? AND sr.review_response IS NULL
-        ''', (review_id,))
+        c.execute(SQL_REVIEW_FOR_RESPONSE, (review_id,))
         review = c.fetchone()
         
         if not review:
-            conn.close()
             return jsonify({'error': 'Review not found or already responded to'}), 404
             
         # Verify the provider owns this service
         provider_id = data.get('provider_id')
         if provider_id != review[1]:
-            conn.close()
             return jsonify({'error': 'Unauthorized to respond to this review'}), 403
 
         # Add response
-        c.execute('''
-            UPDATE service_reviews 
-            SET review_response = ?, 
-                response_date = CURRENT_TIMESTAMP
-            WHERE id = ?
-        ''', (data['response'], review_id))
+        c.execute(SQL_ADD_REVIEW_RESPONSE, (data['response'], review_id))
         
         conn.commit()
         
@@ -1367,26 +2156,22 @@ def add_review_response(review_id):
         
     except Exception as e:
         return jsonify({'error': str(e)}), 500
-    finally:
-        conn.close()
+
+# Every rating value, highest first, as the distribution reports them
+RATING_BUCKETS = (5, 4, 3, 2, 1)
 
 # Helper endpoint to get rating statistics
 @app.route('/api/service/<int:service_id>/rating-stats', methods=['GET'])
+@readonly
 def get_service_rating_stats(service_id):
     try:
-        conn = sqlite3.connect('home_service.db')
+        conn = get_db()
         c = conn.cursor()
         
         # Get rating distribution
-        c.execute('''
-            SELECT rating, COUNT(*) as count
-            FROM service_reviews
-            WHERE service_id = ?
-            GROUP BY rating
-            ORDER BY rating DESC
-        ''', (service_id,))
-        
-        distribution = {i: 0 for i in range(5, 0, -1)}  # Initialize counts for all ratings
+        c.execute(SQL_RATING_DISTRIBUTION, (service_id,))
+        
+        distribution = dict.fromkeys(RATING_BUCKETS, 0)  # Initialize counts for all ratings
         for row in c.fetchall():
             distribution[row[0]] = row[1]
             
@@ -1399,73 +2184,38 @@ def get_service_rating_stats(service_id):
             for rating, count in distribution.items()
         }
 
-        # Calculate total rating and average rating
-        c.execute('''
-            SELECT SUM(rating), COUNT(*) 
-            FROM service_reviews 
-            WHERE service_id = ?
-        ''', (service_id,))
-        total_rating, review_count = c.fetchone()
-        average_rating = total_rating / review_count if review_count > 0 else 0
+        # Calculate total rating and average rating from the same distribution
+        total_rating = sum(rating * count for rating, count in distribution.items())
+        average_rating = total_rating / total_reviews if total_reviews > 0 else 0
 
         return jsonify({
             'distribution': distribution,
             'distribution_percentage': distribution_percentage,
             'total_reviews': total_reviews,
-            'total_rating': total_rating or 0,
+            'total_rating': total_rating,
             'average_rating': average_rating
         }), 200
         
     except Exception as e:
         return jsonify({'error': str(e)}), 500
-    finally:
-        conn.close()
 
 @app.route('/api/dashboard/stats', methods=['GET'])
+@readonly
 def get_dashboard_stats():
     try:
-        conn = sqlite3.connect('home_service.db')
+        conn = get_db()
         c = conn.cursor()
         
-        # Get total users
-        c.execute('SELECT COUNT(*) FROM users')
-        total_users = c.fetchone()[0]
-        
-        # Get total verified service providers
-        c.execute('''
-            SELECT COUNT(*) 
-            FROM service_providers 
-            WHERE verification_status = 'approved'
-        ''')
-        total_providers = c.fetchone()[0]
-        
-        # Get total active services from verified providers
-        c.execute('''
-            SELECT COUNT(*) 
-            FROM services s
-            JOIN service_providers p ON s.provider_id = p.id
-            WHERE s.status = 1 
-            AND p.verification_status = 'approved'
-        ''')
-        total_active_services = c.fetchone()[0]
-        
-        # Get total completed services from verified providers
-        c.execute('''
-            SELECT COUNT(*) 
-            FROM bookings b
-            JOIN service_providers p ON b.provider_id = p.id
-            WHERE b.status = 'completed'
-            AND p.verification_status = 'approved'
-        ''')
-        total_completed_services = c.fetchone()[0]
-        
-        conn.close()
+        # All four counts in one statement; the services and bookings counts
+        # only include verified providers
+        c.execute(SQL_DASHBOARD_STATS)
+        stats = c.fetchone()
         
         return jsonify({
-            'total_users': total_users,
-            'total_verified_providers': total_providers,
-            'total_active_services': total_active_services,
-            'total_completed_services': total_completed_services
+            'total_users': stats['total_users'],
+            'total_verified_providers': stats['total_providers'],
+            'total_active_services': stats['total_active_services'],
+            'total_completed_services': stats['total_completed_services']
         }), 200
         
     except Exception as e:
@@ -1493,70 +2243,70 @@ def report_provider(provider_id):
                 if not allowed_video_file(video.filename):
                     return jsonify({'error': 'Invalid video format'}), 400
 
-                # Check file size
-                video.seek(0, os.SEEK_END)
-                size = video.tell()
-                if size > MAX_VIDEO_SIZE:
-                    return jsonify({'error': 'Video file too large'}), 400
-                video.seek(0)
-
                 # Generate unique filename
                 timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-                filename = secure_filename(f"{timestamp}_{video.filename}")
+                filename = secure_filename(f"{timestamp}_{uuid.uuid4().hex[:8]}_{video.filename}")
                 video_path = os.path.join('reports', filename)
-                
-                # Save the video
-                video.save(os.path.join(UPLOAD_FOLDER, video_path))
 
-        conn = sqlite3.connect('home_service.db')
+        conn = get_db()
         c = conn.cursor()
         
         # Check if provider exists
-        c.execute('SELECT id FROM service_providers WHERE id = ?', (provider_id,))
-        if not c.fetchone():
-            conn.close()
+        c.execute(SQL_PROVIDER_EXISTS, (provider_id,))
+        if not c.fetchone()[0]:
             return jsonify({'error': 'Provider not found'}), 404
 
         # Create report
-        c.execute('''
-            INSERT INTO provider_reports (
-                provider_id, user_id, reason, description, 
-                video_path, status
-            )
-            VALUES (?, ?, ?, ?, ?, 'pending')
-        ''', (
+        c.execute(SQL_INSERT_PROVIDER_REPORT, (
             provider_id,
             user_id,
             reason,
             description,
             video_path
         ))
-        
-        conn.commit()
         report_id = c.lastrowid
-        conn.close()
+
+        # Keep the video only once the report row is in: it is already on
+        # disk next to its final name. A failed link or commit leaves the
+        # insert uncommitted, and the pool rolls it back.
+        if video_path:
+            video.stream.flush()
+            os.link(video.stream.name, os.path.join(UPLOAD_FOLDER, video_path))
+        try:
+            conn.commit()
+        except Exception:
+            if video_path:
+                os.unlink(os.path.join(UPLOAD_FOLDER, video_path))
+            raise
 
         return jsonify({
             'message': 'Report submitted successfully',
             'report_id': report_id
         }), 201
 
+    except sqlite3.IntegrityError:
+        # The provider was checked above, so the reporting user is unknown
+        return jsonify({'error': 'User not found'}), 404
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 @app.route('/api/provider/reports', methods=['GET'])
+@readonly
 def get_provider_reports():
     try:
-        conn = sqlite3.connect('home_service.db')
+        conn = get_db()
         c = conn.cursor()
         
+        etag = listing_etag('provider_reports', 'users', 'service_providers')
+        unchanged = not_modified(etag, private=True)
+        if unchanged:
+            return unchanged
+        
         # Get query parameters
         provider_id = request.args.get('provider_id', type=int)
         status = request.args.get('status')
         
-        query = '''
-            SELECT pr.*, u.name as reporter_name, u.email as reporter_email,
-                   sp.business_name as provider_name
+        filtered = '''
             FROM provider_reports pr
             JOIN users u ON pr.user_id = u.id
             JOIN service_providers sp ON pr.provider_id = sp.id
@@ -1565,30 +2315,28 @@ def get_provider_reports():
         params = []
         
         if provider_id:
-            query += ' AND pr.provider_id = ?'
+            filtered += ' AND pr.provider_id = ?'
             params.append(provider_id)
             
         if status:
-            query += ' AND pr.status = ?'
+            filtered += ' AND pr.status = ?'
             params.append(status)
-            
-        query += ' ORDER BY pr.created_at DESC'
         
-        c.execute(query, params)
+        total = conn.execute('SELECT COUNT(*)' + filtered, params).fetchone()[0]
+            
+        # Per-provider counts ride along on each row as window aggregates
+        # over the filtered reports, so one scan serves both lists
+        query = '''
+            SELECT pr.*, u.name as reporter_name, u.email as reporter_email,
+                   sp.business_name as provider_name,
+                   COUNT(*) OVER (PARTITION BY pr.provider_id) as provider_total_reports,
+                   SUM(CASE WHEN pr.status = 'pending' THEN 1 ELSE 0 END)
+                       OVER (PARTITION BY pr.provider_id) as provider_pending_reports
+        ''' + filtered + ' ORDER BY pr.created_at DESC, pr.id DESC LIMIT ? OFFSET ?'
+        limit, offset = page_args()
+        
+        c.execute(query, (*params, limit, offset))
         reports = c.fetchall()
-        
-        # Get report counts per provider
-        c.execute('''
-            SELECT pr.provider_id, sp.business_name,
-                   COUNT(*) as total_reports,
-                   SUM(CASE WHEN pr.status = 'pending' THEN 1 ELSE 0 END) as pending_reports
-            FROM provider_reports pr
-            JOIN service_providers sp ON pr.provider_id = sp.id
-            GROUP BY pr.provider_id
-        ''')
-        report_counts = c.fetchall()
-        
-        conn.close()
 
         reports_list = [{
             'id': report[0],
@@ -1606,31 +2354,38 @@ def get_provider_reports():
             'provider_name': report[12]
         } for report in reports]
 
-        provider_stats = [{
-            'provider_id': count[0],
-            'provider_name': count[1],
-            'total_reports': count[2],
-            'pending_reports': count[3]
-        } for count in report_counts]
+        # One entry per provider in this page, in order of first appearance
+        provider_stats = {}
+        for report in reports:
+            if report['provider_id'] not in provider_stats:
+                provider_stats[report['provider_id']] = {
+                    'provider_id': report['provider_id'],
+                    'provider_name': report['provider_name'],
+                    'total_reports': report['provider_total_reports'],
+                    'pending_reports': report['provider_pending_reports']
+                }
 
-        return jsonify({
-            'total_reports': len(reports_list),
+        response = jsonify({
+            'total_reports': total,
             'reports': reports_list,
-            'provider_statistics': provider_stats
-        }), 200
+            'provider_statistics': list(provider_stats.values()),
+            **page_info(limit, offset, len(reports_list), total)
+        })
+        response.set_etag(etag)
+        return cache_for(response, private=True), 200
 
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 @app.route('/api/provider/report/<int:report_id>/video', methods=['GET'])
+@readonly
 def get_report_video(report_id):
     try:
-        conn = sqlite3.connect('home_service.db')
+        conn = get_db()
         c = conn.cursor()
         
-        c.execute('SELECT video_path FROM provider_reports WHERE id = ?', (report_id,))
+        c.execute(SQL_REPORT_VIDEO_PATH, (report_id,))
         result = c.fetchone()
-        conn.close()
 
         if not result or not result[0]:
             return jsonify({'error': 'Video not found'}), 404
@@ -1639,28 +2394,30 @@ def get_report_video(report_id):
         if not os.path.exists(video_path):
             return jsonify({'error': 'Video file not found'}), 404
 
-        return send_file(video_path)
+        if X_ACCEL_UPLOADS:
+            response = app.response_class(
+                mimetype=mimetypes.guess_type(video_path)[0] or 'application/octet-stream'
+            )
+            response.headers['X-Accel-Redirect'] = X_ACCEL_UPLOADS + result[0]
+            return response
+
+        # ETag/Last-Modified from the file's size and mtime, with 304 and
+        # range request support
+        return send_from_directory(UPLOAD_FOLDER, result[0], conditional=True, etag=True)
 
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 @app.route('/api/provider/report/<int:report_id>', methods=['GET'])
+@readonly
 def get_report_details(report_id):
     try:
-        conn = sqlite3.connect('home_service.db')
+        conn = get_db()
         c = conn.cursor()
         
-        c.execute('''
-            SELECT pr.*, u.name as reporter_name, u.email as reporter_email,
-                   sp.business_name as provider_name
-            FROM provider_reports pr
-            JOIN users u ON pr.user_id = u.id
-            JOIN service_providers sp ON pr.provider_id = sp.id
-            WHERE pr.id = ?
-        ''', (report_id,))
+        c.execute(SQL_REPORT_DETAILS, (report_id,))
         
         report = c.fetchone()
-        conn.close()
 
         if not report:
             return jsonify({'error': 'Report not found'}), 404
@@ -1693,45 +2450,26 @@ def get_report_details(report_id):
 
 # Admin endpoints for provider verification
 @app.route('/api/admin/providers/pending', methods=['GET'])
+@readonly
 def get_pending_providers():
     try:
-        conn = sqlite3.connect('home_service.db')
+        conn = get_db()
         c = conn.cursor()
         
-        c.execute('''
-            SELECT id, business_photo, business_name, owner_name, 
-                   service_category, custom_category, email, phone_number,
-                   verification_status, verification_notes, created_at
-            FROM service_providers
-            WHERE verification_status = 'pending'
-            ORDER BY created_at DESC
-        ''')
-        
-        providers = c.fetchall()
-        conn.close()
-
-        providers_list = [{
-            'id': p[0],
-            'business_photo': p[1],
-            'business_name': p[2],
-            'owner_name': p[3],
-            'service_category': p[4],
-            'custom_category': p[5],
-            'email': p[6],
-            'phone_number': p[7],
-            'verification_status': p[8],
-            'verification_notes': p[9],
-            'created_at': p[10]
-        } for p in providers]
+        total = c.execute(SQL_PENDING_PROVIDERS_COUNT).fetchone()[0]
 
-        return jsonify({
-            'total_pending': len(providers_list),
-            'providers': providers_list
-        }), 200
+        # Rows are encoded as the cursor yields them
+        limit, offset = page_args()
+        providers = c.execute(SQL_PENDING_PROVIDERS, (limit, offset))
+        return stream_json_rows('providers', providers, count_key='total_pending',
+                                total=total, page=(limit, offset)), 200
 
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+# Statuses an admin can set on a provider
+VERIFICATION_DECISIONS = frozenset({'approved', 'rejected'})
+
 @app.route('/api/admin/provider/<int:provider_id>/verify', methods=['PUT'])
 def verify_provider(provider_id):
     try:
@@ -1739,21 +2477,15 @@ def verify_provider(provider_id):
         if 'status' not in data:
             return jsonify({'error': 'Verification status is required'}), 400
             
-        if data['status'] not in ['approved', 'rejected']:
+        if data['status'] not in VERIFICATION_DECISIONS:
             return jsonify({'error': 'Invalid verification status'}), 400
 
-        conn = sqlite3.connect('home_service.db')
-        c = conn.cursor()
-        
-        c.execute('''
-            UPDATE service_providers 
-            SET verification_status = ?,
-                verification_notes = ?
-            WHERE id = ?
-        ''', (data['status'], data.get('notes'), provider_id))
-        
-        conn.commit()
-        conn.close()
+        # Committed by the background writer together with concurrent writes;
+        # nothing updated means there is no such provider
+        updated = writer.execute(SQL_VERIFY_PROVIDER, (data['status'], data.get('notes'), provider_id))
+        if not updated:
+            return jsonify({'error': 'Provider not found'}), 404
+        invalidate_verification_counts()
 
         return jsonify({
             'message': f'Provider {data["status"]} successfully',
@@ -1765,19 +2497,15 @@ def verify_provider(provider_id):
         return jsonify({'error': str(e)}), 500
 
 @app.route('/api/provider/<int:provider_id>/verification-status', methods=['GET'])
+@readonly
 def get_provider_verification_status(provider_id):
     try:
-        conn = sqlite3.connect('home_service.db')
+        conn = get_db()
         c = conn.cursor()
         
-        c.execute('''
-            SELECT verification_status, verification_notes 
-            FROM service_providers 
-            WHERE id = ?
-        ''', (provider_id,))
+        c.execute(SQL_PROVIDER_VERIFICATION_STATUS, (provider_id,))
         
         result = c.fetchone()
-        conn.close()
 
         if not result:
             return jsonify({'error': 'Provider not found'}), 404
@@ -1791,134 +2519,87 @@ def get_provider_verification_status(provider_id):
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+# The admin dashboard polls these counts; keep them per process briefly, and
+# drop them whenever a provider registers or is verified
+VERIFICATION_COUNTS_TTL = 30
+verification_counts_cache = TTLCache(maxsize=1, ttl=VERIFICATION_COUNTS_TTL)
+verification_counts_lock = threading.Lock()
+
+@cached(verification_counts_cache, lock=verification_counts_lock)
+def load_verification_counts():
+    c = get_db().cursor()
+    
+    # Get counts for each verification status
+    c.execute(SQL_VERIFICATION_COUNTS)
+    
+    results = c.fetchall()
+    
+    # Initialize counts dictionary with zeros
+    counts = {
+        'pending': {'total': 0, 'last_7_days': 0, 'last_30_days': 0},
+        'approved': {'total': 0, 'last_7_days': 0, 'last_30_days': 0},
+        'rejected': {'total': 0, 'last_7_days': 0, 'last_30_days': 0}
+    }
+    
+    # Update counts from database results
+    for status, total, last_7, last_30 in results:
+        if status in counts:
+            counts[status] = {
+                'total': total,
+                'last_7_days': last_7 or 0,
+                'last_30_days': last_30 or 0
+            }
+    
+    # Calculate totals
+    total_providers = sum(status['total'] for status in counts.values())
+    
+    # Get latest pending providers
+    c.execute(SQL_LATEST_PENDING_PROVIDERS)
+    latest_pending = [dict(row) for row in c.fetchall()]
+    
+    return {
+        'total_providers': total_providers,
+        'counts': counts,
+        'latest_pending': latest_pending,
+        'summary': {
+            'pending_percentage': (counts['pending']['total'] / total_providers * 100) if total_providers > 0 else 0,
+            'approved_percentage': (counts['approved']['total'] / total_providers * 100) if total_providers > 0 else 0,
+            'rejected_percentage': (counts['rejected']['total'] / total_providers * 100) if total_providers > 0 else 0
+        }
+    }
+
+def invalidate_verification_counts():
+    with verification_counts_lock:
+        verification_counts_cache.clear()
+
 @app.route('/api/admin/verification/counts', methods=['GET'])
+@readonly
 def get_verification_counts():
     try:
-        conn = sqlite3.connect('home_service.db')
-        c = conn.cursor()
-        
-        # Get counts for each verification status
-        c.execute('''
-            SELECT 
-                verification_status,
-                COUNT(*) as count,
-                COUNT(CASE WHEN created_at >= date('now', '-7 days') THEN 1 END) as last_7_days,
-                COUNT(CASE WHEN created_at >= date('now', '-30 days') THEN 1 END) as last_30_days
-            FROM service_providers
-            GROUP BY verification_status
-        ''')
-        
-        results = c.fetchall()
-        
-        # Initialize counts dictionary with zeros
-        counts = {
-            'pending': {'total': 0, 'last_7_days': 0, 'last_30_days': 0},
-            'approved': {'total': 0, 'last_7_days': 0, 'last_30_days': 0},
-            'rejected': {'total': 0, 'last_7_days': 0, 'last_30_days': 0}
-        }
-        
-        # Update counts from database results
-        for status, total, last_7, last_30 in results:
-            if status in counts:
-                counts[status] = {
-                    'total': total,
-                    'last_7_days': last_7 or 0,
-                    'last_30_days': last_30 or 0
-                }
-        
-        # Calculate totals
-        total_providers = sum(status['total'] for status in counts.values())
-        
-        # Get latest pending providers
-        c.execute('''
-            SELECT id, business_name, created_at
-            FROM service_providers
-            WHERE verification_status = 'pending'
-            ORDER BY created_at DESC
-            LIMIT 5
-        ''')
-        latest_pending = [{
-            'id': row[0],
-            'business_name': row[1],
-            'created_at': row[2]
-        } for row in c.fetchall()]
-        
-        conn.close()
-
-        return jsonify({
-            'total_providers': total_providers,
-            'counts': counts,
-            'latest_pending': latest_pending,
-            'summary': {
-                'pending_percentage': (counts['pending']['total'] / total_providers * 100) if total_providers > 0 else 0,
-                'approved_percentage': (counts['approved']['total'] / total_providers * 100) if total_providers > 0 else 0,
-                'rejected_percentage': (counts['rejected']['total'] / total_providers * 100) if total_providers > 0 else 0
-            }
-        }), 200
+        return jsonify(load_verification_counts()), 200
 
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 @app.route('/api/admin/provider/<int:provider_id>/details', methods=['GET'])
+@readonly
 def get_provider_details_for_admin(provider_id):
     try:
-        conn = sqlite3.connect('home_service.db')
+        conn = get_db()
         c = conn.cursor()
         
-        # Get provider details including verification status
-        c.execute('''
-            SELECT id, business_photo, business_name, owner_name, 
-                   service_category, custom_category, email, phone_number,
-                   verification_status, verification_notes, created_at,
-                   total_rating, rating_count
-            FROM service_providers 
-            WHERE id = ?
-        ''', (provider_id,))
-        
+        # Provider details with its report, service and booking statistics
+        c.execute(SQL_ADMIN_PROVIDER_DETAILS, {'provider_id': provider_id})
         provider = c.fetchone()
         
         if not provider:
-            conn.close()
             return jsonify({'error': 'Provider not found'}), 404
 
-        # Get any reports filed against this provider
-        c.execute('''
-            SELECT COUNT(*) as report_count,
-                   COUNT(CASE WHEN status = 'pending' THEN 1 END) as pending_reports
-            FROM provider_reports
-            WHERE provider_id = ?
-        ''', (provider_id,))
-        
-        report_stats = c.fetchone()
-        
-        # Get service count
-        c.execute('''
-            SELECT COUNT(*) 
-            FROM services 
-            WHERE provider_id = ?
-        ''', (provider_id,))
-        
-        service_count = c.fetchone()[0]
-        
-        # Get booking statistics
-        c.execute('''
-            SELECT 
-                COUNT(*) as total_bookings,
-                COUNT(CASE WHEN status = 'completed' THEN 1 END) as completed_bookings,
-                COUNT(CASE WHEN status = 'cancelled' THEN 1 END) as cancelled_bookings
-            FROM bookings
-            WHERE provider_id = ?
-        ''', (provider_id,))
-        
-        booking_stats = c.fetchone()
-        
-        conn.close()
+        report_stats = provider[13:15]
+        service_count = provider[15]
+        booking_stats = provider[16:19]
 
         # Format the response
-        category_display = provider[4]  # Default to main category
-        if provider[4] == 'Other' and provider[5]:  # If category is "Other" and custom_category exists
-            category_display = provider[5]
-
         return jsonify({
             'provider': {
                 'id': provider[0],
@@ -1927,7 +2608,7 @@ def get_provider_details_for_admin(provider_id):
                 'owner_name': provider[3],
                 'service_category': provider[4],
                 'custom_category': provider[5],
-                'category_display': category_display,
+                'category_display': provider['category_display'],
                 'email': provider[6],
                 'phone_number': provider[7],
                 'verification_status': provider[8],
@@ -1946,7 +2627,7 @@ def get_provider_details_for_admin(provider_id):
                     'total': booking_stats[0],
                     'completed': booking_stats[1],
                     'cancelled': booking_stats[2],
-                    'completion_rate': (booking_stats[1] / booking_stats[0] * 100) if booking_stats[0] > 0 else 0
+                    'completion_rate': provider['completion_rate']
                 },
                 'reports': {
                     'total': report_stats[0],
@@ -1963,48 +2644,24 @@ def get_provider_details_for_admin(provider_id):
         return jsonify({'error': str(e)}), 500
 
 @app.route('/api/bookings/monthly-completed', methods=['GET'])
+@readonly
 def get_monthly_completed_bookings():
     try:
-        conn = sqlite3.connect('home_service.db')
+        conn = get_db()
         c = conn.cursor()
         
         # Query to get completed bookings count for each month
-        c.execute('''
-            WITH RECURSIVE months(month_num) AS (
-                SELECT 1
-                UNION ALL
-                SELECT month_num + 1
-                FROM months
-                WHERE month_num < 6
-            )
-            SELECT 
-                CASE month_num
-                    WHEN 1 THEN 'January'
-                    WHEN 2 THEN 'February'
-                    WHEN 3 THEN 'March'
-                    WHEN 4 THEN 'April'
-                    WHEN 5 THEN 'May'
-                    WHEN 6 THEN 'June'
-                END as Month,
-                COALESCE(COUNT(b.id), 0) as Count
-            FROM months m
-            LEFT JOIN bookings b ON 
-                strftime('%m', b.booking_date) = printf('%02d', m.month_num)
-                AND strftime('%Y', b.booking_date) = strftime('%Y', 'now')
-                AND b.status = 'completed'
-            GROUP BY month_num
-            ORDER BY month_num
-        ''')
+        c.execute(SQL_MONTHLY_COMPLETED_BOOKINGS)
         
-        results = c.fetchall()
-        conn.close()
+        counts = dict(c.fetchall())
 
+        # Months without completed bookings have no row
         monthly_counts = [
             {
                 "Month": month,
-                "Count": count
+                "Count": counts.get(month_num, 0)
             }
-            for month, count in results
+            for month_num, month in enumerate(REPORT_MONTHS, 1)
         ]
 
         return jsonify(monthly_counts), 200
@@ -2013,40 +2670,17 @@ def get_monthly_completed_bookings():
         return jsonify({'error': str(e)}), 500
     
 @app.route('/api/reviews/latest', methods=['GET'])
+@readonly
 def get_latest_reviews():
     try:
-        conn = sqlite3.connect('home_service.db')
+        conn = get_db()
         c = conn.cursor()
         
-        c.execute('''
-            SELECT 
-                r.id,
-                r.rating,
-                r.review_text,
-                r.created_at,
-                s.service_title,
-                u.name as user_name,
-                p.business_name as provider_name
-            FROM service_reviews r
-            JOIN services s ON r.service_id = s.id
-            JOIN users u ON r.user_id = u.id
-            JOIN service_providers p ON s.provider_id = p.id
-            ORDER BY r.created_at DESC
-            LIMIT 3
-        ''')
+        c.execute(SQL_LATEST_REVIEWS)
         
         reviews = c.fetchall()
-        conn.close()
 
-        latest_reviews = [{
-            'id': review[0],
-            'rating': review[1],
-            'review_text': review[2],
-            'created_at': review[3],
-            'service_title': review[4],
-            'user_name': review[5],
-            'provider_name': review[6]
-        } for review in reviews]
+        latest_reviews = [dict(review) for review in reviews]
 
         return jsonify(latest_reviews), 200
 
@@ -2054,46 +2688,29 @@ def get_latest_reviews():
         return jsonify({'error': str(e)}), 500
     
 @app.route('/api/providers/top', methods=['GET'])
+@readonly
 def get_top_providers():
     try:
-        conn = sqlite3.connect('home_service.db')
+        conn = get_db()
         c = conn.cursor()
         
-        c.execute('''
-            SELECT 
-                p.id,
-                p.business_name,
-                p.business_photo,
-                p.service_category,
-                p.custom_category,
-                p.total_rating,
-                p.rating_count,
-                COUNT(b.id) as total_bookings,
-                COUNT(CASE WHEN b.status = 'completed' THEN 1 END) as completed_bookings
-            FROM service_providers p
-            LEFT JOIN bookings b ON p.id = b.provider_id
-            WHERE p.verification_status = 'approved'
-            GROUP BY p.id
-            ORDER BY p.total_rating DESC, p.rating_count DESC
-            LIMIT 3
-        ''')
+        c.execute(SQL_TOP_PROVIDERS)
         
         providers = c.fetchall()
-        conn.close()
 
         top_providers = [{
             'rank': idx + 1,  # Add ranking number
             'id': provider[0],
             'business_name': provider[1],
             'business_photo': provider[2],
-            'category': provider[3] if provider[3] != 'Other' else provider[4],
+            'category': provider[3],
             'rating': {
-                'average': provider[5],
-                'count': provider[6]
+                'average': provider[4],
+                'count': provider[5]
             },
             'bookings': {
-                'total': provider[7],
-                'completed': provider[8]
+                'total': provider[6],
+                'completed': provider[7]
             }
         } for idx, provider in enumerate(providers)]
 
@@ -2103,50 +2720,30 @@ def get_top_providers():
         return jsonify({'error': str(e)}), 500
     
 @app.route('/api/services/top', methods=['GET'])
+@readonly
 def get_top_services():
     try:
-        conn = sqlite3.connect('home_service.db')
+        conn = get_db()
         c = conn.cursor()
         
-        c.execute('''
-            SELECT 
-                s.id,
-                s.service_title,
-                s.service_image,
-                s.category,
-                s.custom_category,
-                s.price,
-                s.total_rating,
-                s.rating_count,
-                p.business_name as provider_name,
-                COUNT(b.id) as total_bookings,
-                COUNT(CASE WHEN b.status = 'completed' THEN 1 END) as completed_bookings
-            FROM services s
-            JOIN service_providers p ON s.provider_id = p.id
-            LEFT JOIN bookings b ON s.id = b.service_id
-            WHERE p.verification_status = 'approved'
-            GROUP BY s.id
-            ORDER BY total_bookings DESC
-            LIMIT 3
-        ''')
+        c.execute(SQL_TOP_SERVICES)
         
         services = c.fetchall()
-        conn.close()
 
         top_services = [{
             'id': service[0],
             'service_title': service[1],
             'service_image': service[2],
-            'category': service[3] if service[3] != 'Other' else service[4],
-            'price': service[5],
+            'category': service[3],
+            'price': service[4],
             'rating': {
-                'average': service[6],
-                'count': service[7]
+                'average': service[5],
+                'count': service[6]
             },
-            'provider_name': service[8],
+            'provider_name': service[7],
             'bookings': {
-                'total': service[9],
-                'completed': service[10]
+                'total': service[8],
+                'completed': service[9]
             }
         } for service in services]
 
@@ -2156,79 +2753,19 @@ def get_top_services():
         return jsonify({'error': str(e)}), 500
 
 @app.route('/api/activities/recent', methods=['GET'])
+@readonly
 def get_recent_activities():
     try:
-        conn = sqlite3.connect('home_service.db')
+        conn = get_db()
         c = conn.cursor()
         
-        # Get recent bookings
-        c.execute('''
-            SELECT 
-                'booking' as type,
-                b.id,
-                b.status,
-                b.booking_date,
-                b.booking_time,
-                u.name as user_name,
-                s.service_title,
-                p.business_name as provider_name,
-                b.created_at
-            FROM bookings b
-            JOIN users u ON b.user_id = u.id
-            JOIN services s ON b.service_id = s.id
-            JOIN service_providers p ON b.provider_id = p.id
-            ORDER BY b.created_at DESC
-            LIMIT 3
-        ''')
+        # The 3 most recent bookings and reviews combined
+        c.execute(SQL_RECENT_ACTIVITIES, {'limit': 3})
         
-        bookings = [{
-            'type': 'booking',
-            'id': row[1],
-            'status': row[2],
-            'booking_date': row[3],
-            'booking_time': row[4],
-            'user_name': row[5],
-            'service_title': row[6],
-            'provider_name': row[7],
-            'created_at': row[8]
-        } for row in c.fetchall()]
-        
-        # Get recent reviews
-        c.execute('''
-            SELECT 
-                'review' as type,
-                r.id,
-                r.rating,
-                r.review_text,
-                u.name as user_name,
-                s.service_title,
-                p.business_name as provider_name,
-                r.created_at
-            FROM service_reviews r
-            JOIN users u ON r.user_id = u.id
-            JOIN services s ON r.service_id = s.id
-            JOIN service_providers p ON s.provider_id = p.id
-            ORDER BY r.created_at DESC
-            LIMIT 3
-        ''')
+        activities = [{field: row[field] for field in ACTIVITY_FIELDS[row['type']]}
+                      for row in c.fetchall()]
         
-        reviews = [{
-            'type': 'review',
-            'id': row[1],
-            'rating': row[2],
-            'review_text': row[3],
-            'user_name': row[4],
-            'service_title': row[5],
-            'provider_name': row[6],
-            'created_at': row[7]
-        } for row in c.fetchall()]
-        
-        # Combine and sort all activities by created_at
-        all_activities = bookings + reviews
-        all_activities.sort(key=lambda x: x['created_at'], reverse=True)
-        
-        # Return only the 3 most recent activities
-        return jsonify(all_activities[:3]), 200
+        return jsonify(activities), 200
 
     except Exception as e:
         return jsonify({'error': str(e)}), 500
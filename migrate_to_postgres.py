@@ -2,6 +2,17 @@ import sqlite3
 import psycopg2
 from psycopg2.extras import execute_values
 
+# Rows read from SQLite per batch, and rows per INSERT statement sent to
+# PostgreSQL; keeps memory bounded however large the table is
+FETCH_BATCH_SIZE = 10000
+INSERT_PAGE_SIZE = 1000
+
+PROVIDER_COLUMNS = (
+    'id, business_photo, business_name, owner_name, service_category, '
+    'custom_category, email, phone_number, password, total_rating, '
+    'rating_count, created_at'
+)
+
 def migrate_data():
     # Connect to SQLite
     sqlite_conn = sqlite3.connect('home_service.db')
@@ -36,12 +47,17 @@ def migrate_data():
         ''')
         
         # Migrate service providers
-        sqlite_cur.execute('SELECT * FROM service_providers')
-        providers = sqlite_cur.fetchall()
-        if providers:
+        # Columns are listed explicitly since the SQLite table has gained
+        # columns the PostgreSQL schema doesn't have
+        sqlite_cur.execute(f'SELECT {PROVIDER_COLUMNS} FROM service_providers')
+        while True:
+            providers = sqlite_cur.fetchmany(FETCH_BATCH_SIZE)
+            if not providers:
+                break
             execute_values(pg_cur,
-                'INSERT INTO service_providers (id, business_photo, business_name, owner_name, service_category, custom_category, email, phone_number, password, total_rating, rating_count, created_at) VALUES %s',
-                providers
+                f'INSERT INTO service_providers ({PROVIDER_COLUMNS}) VALUES %s',
+                providers,
+                page_size=INSERT_PAGE_SIZE
             )
         
         # Create and migrate other tables similarly...
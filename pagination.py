@@ -0,0 +1,16 @@
+from flask import request
+
+# Listing endpoints return at most MAX_PAGE_SIZE rows per request
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 100
+
+# (limit, offset) from ?limit= and ?offset=, clamped to sane values
+def page_args():
+    limit = request.args.get('limit', DEFAULT_PAGE_SIZE, type=int)
+    offset = request.args.get('offset', 0, type=int)
+    return max(1, min(limit, MAX_PAGE_SIZE)), max(0, offset)
+
+# Fields describing one page of a listing; the listing's own total field
+# keeps counting every matching row
+def page_info(limit, offset, count, total):
+    return {'limit': limit, 'offset': offset, 'has_more': offset + count < total}
@@ -1,13 +1,49 @@
 from flask import Blueprint, request, jsonify
-from werkzeug.security import generate_password_hash, check_password_hash
 import sqlite3
+from db import connect, get_db, readonly, transaction, writer
+from pagination import page_args
+from passwords import hash_password, verify_password, needs_rehash
+from json_provider import stream_json_rows
 
 
 # Create a Blueprint for user routes
 user_bp = Blueprint('user', __name__)
 
+SQL_INSERT_USER = '''
+    INSERT INTO users (name, email, mobile, password)
+    VALUES (?, ?, ?, ?)
+'''
+
+# Looked up through the index behind the UNIQUE email constraint
+SQL_USER_LOGIN = 'SELECT id, name, email, mobile, password FROM users WHERE email = ?'
+
+SQL_UPDATE_USER_PASSWORD = 'UPDATE users SET password = ? WHERE id = ?'
+
+SQL_ALL_USERS = '''
+    SELECT id, name, email, mobile, created_at 
+    FROM users
+    ORDER BY created_at DESC
+    LIMIT ? OFFSET ?
+'''
+
+SQL_USER_COUNT = 'SELECT COUNT(*) FROM users'
+
+SQL_USER_EXISTS = 'SELECT EXISTS(SELECT 1 FROM users WHERE id = ?)'
+
+# Inserts nothing unless the service exists and isn't already a favorite
+SQL_INSERT_FAVORITE = '''
+    INSERT INTO favorites (user_id, service_id)
+    SELECT :user_id, :service_id
+    WHERE EXISTS (SELECT 1 FROM services WHERE id = :service_id)
+    ON CONFLICT (user_id, service_id) DO NOTHING
+'''
+
+SQL_SERVICE_EXISTS = 'SELECT EXISTS(SELECT 1 FROM services WHERE id = ?)'
+
+SQL_DELETE_FAVORITE = 'DELETE FROM favorites WHERE user_id = ? AND service_id = ?'
+
 def init_user_db():
-    conn = sqlite3.connect('home_service.db')
+    conn = connect()
     c = conn.cursor()
     
     c.execute('''
@@ -33,6 +69,10 @@ def init_user_db():
         )
     ''')
     
+    # User list, newest first
+    c.execute('''CREATE INDEX IF NOT EXISTS idx_users_created
+                 ON users (created_at DESC)''')
+    
     conn.commit()
     conn.close()
 
@@ -50,16 +90,13 @@ def register_user():
                 return jsonify({'error': f'{field} is required'}), 400
 
         # Hash password
-        hashed_password = generate_password_hash(data['password'])
+        hashed_password = hash_password(data['password'])
 
         # Store in database
-        conn = sqlite3.connect('home_service.db')
+        conn = get_db()
         c = conn.cursor()
         
-        c.execute('''
-            INSERT INTO users (name, email, mobile, password)
-            VALUES (?, ?, ?, ?)
-        ''', (
+        c.execute(SQL_INSERT_USER, (
             data['name'],
             data['email'],
             data['mobile'],
@@ -68,7 +105,6 @@ def register_user():
         
         conn.commit()
         user_id = c.lastrowid
-        conn.close()
 
         return jsonify({
             'message': 'User registered successfully',
@@ -88,58 +124,49 @@ def login_user():
         if not data or 'email' not in data or 'password' not in data:
             return jsonify({'error': 'Email and password are required'}), 400
 
-        conn = sqlite3.connect('home_service.db')
+        conn = get_db()
         c = conn.cursor()
         
-        c.execute('SELECT * FROM users WHERE email = ?', (data['email'],))
+        c.execute(SQL_USER_LOGIN, (data['email'],))
         user = c.fetchone()
-        conn.close()
 
         if not user:
             return jsonify({'error': 'Invalid email or password'}), 401
 
         # Check password
-        if not check_password_hash(user[4], data['password']):
+        if not verify_password(user['password'], data['password']):
             return jsonify({'error': 'Invalid email or password'}), 401
 
+        # Upgrade older hashes now that the plain password is known
+        if needs_rehash(user['password']):
+            c.execute(SQL_UPDATE_USER_PASSWORD, (hash_password(data['password']), user['id']))
+            conn.commit()
+
         return jsonify({
             'message': 'Login successful',
-            'user_id': user[0],
-            'name': user[1],
-            'email': user[2],
-            'mobile': user[3]
+            'user_id': user['id'],
+            'name': user['name'],
+            'email': user['email'],
+            'mobile': user['mobile']
         }), 200
 
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 @user_bp.route('/users', methods=['GET'])
+@readonly
 def get_all_users():
     try:
-        conn = sqlite3.connect('home_service.db')
+        conn = get_db()
         c = conn.cursor()
         
-        c.execute('''
-            SELECT id, name, email, mobile, created_at 
-            FROM users
-            ORDER BY created_at DESC
-        ''')
-        
-        users = c.fetchall()
-        conn.close()
+        total = c.execute(SQL_USER_COUNT).fetchone()[0]
 
-        users_list = [{
-            'id': user[0],
-            'name': user[1],
-            'email': user[2],
-            'mobile': user[3],
-            'created_at': user[4]
-        } for user in users]
-
-        return jsonify({
-            'total_users': len(users_list),
-            'users': users_list
-        }), 200
+        # Rows are encoded as the cursor yields them
+        limit, offset = page_args()
+        users = c.execute(SQL_ALL_USERS, (limit, offset))
+        return stream_json_rows('users', users, count_key='total_users',
+                                total=total, page=(limit, offset)), 200
 
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -154,55 +181,84 @@ def add_favorite():
             if field not in data:
                 return jsonify({'error': f'{field} is required'}), 400
 
-        conn = sqlite3.connect('home_service.db')
-        c = conn.cursor()
-        
-        # Check if the service exists
-        c.execute('SELECT id FROM services WHERE id = ?', (data['service_id'],))
-        if not c.fetchone():
-            conn.close()
-            return jsonify({'error': 'Service not found'}), 404
-
-        # Add favorite
-        c.execute('''
-            INSERT INTO favorites (user_id, service_id)
-            VALUES (?, ?)
-        ''', (data['user_id'], data['service_id']))
-        
-        conn.commit()
-        conn.close()
+        # Add favorite in one statement, committed by the background writer
+        added = writer.execute(SQL_INSERT_FAVORITE, {
+            'user_id': data['user_id'],
+            'service_id': data['service_id']
+        })
+        if not added:
+            # Nothing inserted: either the service is missing or it's
+            # already a favorite
+            c = get_db().cursor()
+            c.execute(SQL_SERVICE_EXISTS, (data['service_id'],))
+            if not c.fetchone()[0]:
+                return jsonify({'error': 'Service not found'}), 404
+            return jsonify({'error': 'This service is already in your favorites'}), 409
 
         return jsonify({'message': 'Service added to favorites successfully'}), 201
 
     except sqlite3.IntegrityError:
-        return jsonify({'error': 'This service is already in your favorites'}), 409
+        # foreign_keys is enforced on the writer's connection; the service
+        # was checked by the insert and duplicates are skipped, so this is
+        # the user
+        return jsonify({'error': 'User not found'}), 404
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
-@user_bp.route('/favorites', methods=['DELETE'])
-def unfavorite_service():
+# Add several services to a user's favorites in one transaction; services
+# that don't exist or are already favorited are skipped
+@user_bp.route('/favorites/bulk', methods=['POST'])
+def add_favorites_bulk():
     try:
         data = request.get_json()
-        required_fields = ['user_id', 'service_id']
+        required_fields = ['user_id', 'service_ids']
         
         for field in required_fields:
             if field not in data:
                 return jsonify({'error': f'{field} is required'}), 400
 
-        conn = sqlite3.connect('home_service.db')
+        service_ids = data['service_ids']
+        if not isinstance(service_ids, list) or not service_ids:
+            return jsonify({'error': 'service_ids must be a non-empty list'}), 400
+
+        conn = get_db()
         c = conn.cursor()
         
-        # Check if the favorite exists
-        c.execute('SELECT id FROM favorites WHERE user_id = ? AND service_id = ?', (data['user_id'], data['service_id']))
-        if not c.fetchone():
-            conn.close()
-            return jsonify({'error': 'Favorite not found'}), 404
+        c.execute(SQL_USER_EXISTS, (data['user_id'],))
+        if not c.fetchone()[0]:
+            return jsonify({'error': 'User not found'}), 404
 
-        # Remove favorite
-        c.execute('DELETE FROM favorites WHERE user_id = ? AND service_id = ?', (data['user_id'], data['service_id']))
+        with transaction(conn):
+            c.executemany(SQL_INSERT_FAVORITE, [
+                {'user_id': data['user_id'], 'service_id': service_id}
+                for service_id in service_ids
+            ])
+            added = c.rowcount
+
+        return jsonify({
+            'message': 'Favorites updated successfully',
+            'added': added,
+            'skipped': len(service_ids) - added
+        }), 201
+
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@user_bp.route('/favorites', methods=['DELETE'])
+def unfavorite_service():
+    try:
+        data = request.get_json()
+        required_fields = ['user_id', 'service_id']
         
-        conn.commit()
-        conn.close()
+        for field in required_fields:
+            if field not in data:
+                return jsonify({'error': f'{field} is required'}), 400
+
+        # Remove favorite, committed by the background writer; nothing
+        # deleted means it wasn't there
+        deleted = writer.execute(SQL_DELETE_FAVORITE, (data['user_id'], data['service_id']))
+        if not deleted:
+            return jsonify({'error': 'Favorite not found'}), 404
 
         return jsonify({'message': 'Service removed from favorites successfully'}), 200
 